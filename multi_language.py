@@ -0,0 +1,103 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+
+import speech_recognition as sr
+
+
+def top_confidence(alternatives):
+    if not alternatives:
+        return 0.0
+    confidence = alternatives[0][1]
+    return confidence if confidence is not None else 0.0
+
+
+class LanguageSelector:
+    # Fans a segment out to every configured language and keeps the most confident answer.
+    # Once the same language keeps winning confidently, only that language is asked.
+    def __init__(self, recognize, languages, deadline=3.0, confident=0.85, sticky_after=3,
+                 sticky_confidence=0.8, probe_every=10):
+        self.recognize_language = recognize
+        self.languages = list(languages)
+        self.deadline = deadline
+        self.confident = confident
+        self.sticky_confidence = sticky_confidence
+        self.probe_every = probe_every
+        self.recent = deque(maxlen=sticky_after)
+        self.since_probe = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=2 * len(self.languages), thread_name_prefix='language')
+
+    def sticky_language(self):
+        with self.lock:
+            if len(self.recent) < self.recent.maxlen or self.since_probe >= self.probe_every:
+                return None
+            languages = {language for language, _ in self.recent}
+            if len(languages) == 1 and all(c >= self.sticky_confidence for _, c in self.recent):
+                return languages.pop()
+            return None
+
+    def record(self, language, confidence, fanned_out):
+        with self.lock:
+            self.recent.append((language, confidence))
+            self.since_probe = 0 if fanned_out else self.since_probe + 1
+
+    def recognize(self, audio):
+        sticky = self.sticky_language()
+        if sticky:
+            future = self.executor.submit(self.recognize_language, audio, sticky)
+            try:
+                alternatives = future.result(timeout=self.deadline)
+            except (sr.UnknownValueError, TimeoutError):
+                alternatives = None
+            if alternatives and top_confidence(alternatives) >= self.sticky_confidence:
+                self.record(sticky, top_confidence(alternatives), False)
+                return sticky, alternatives
+            # Low confidence may mean the speaker switched languages; ask the others too
+            best = (sticky, alternatives, top_confidence(alternatives)) if alternatives else None
+            return self.fan_out(audio, [l for l in self.languages if l != sticky], best)
+        return self.fan_out(audio, self.languages, None)
+
+    def fan_out(self, audio, languages, best):
+        futures = {self.executor.submit(self.recognize_language, audio, language): language
+                   for language in languages}
+        errors = []
+        understood_nothing = False
+        try:
+            for future in as_completed(futures, timeout=self.deadline):
+                try:
+                    alternatives = future.result()
+                except sr.UnknownValueError:
+                    understood_nothing = True
+                    continue
+                except sr.RequestError as e:
+                    errors.append(e)
+                    continue
+                if not alternatives:
+                    understood_nothing = True
+                    continue
+                confidence = top_confidence(alternatives)
+                if best is None or confidence > best[2]:
+                    best = (futures[future], alternatives, confidence)
+                if confidence >= self.confident:
+                    break
+        except TimeoutError:
+            # Languages still running past the deadline are dropped below
+            pass
+        finally:
+            for future in futures:
+                # Only requests still queued can be cancelled; running ones end at the recognizer's
+                # operation timeout and their answers are ignored
+                future.cancel()
+
+        if best is None:
+            # Only report an outage when no language got through to the service
+            if errors and not understood_nothing:
+                raise errors[0]
+            raise sr.UnknownValueError()
+        language, alternatives, confidence = best
+        self.record(language, confidence, True)
+        return language, alternatives
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
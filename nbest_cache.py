@@ -0,0 +1,63 @@
+import itertools
+import threading
+from collections import OrderedDict
+
+
+class NBestEntry:
+    def __init__(self, entry_id, alternatives):
+        self.entry_id = entry_id
+        self.alternatives = alternatives
+        self.index = 0
+        self.typed = None
+
+    def current(self):
+        return self.alternatives[self.index]
+
+    def advance(self):
+        self.index = (self.index + 1) % len(self.alternatives)
+        return self.current()
+
+    def next_distinct(self, format_text):
+        # Alternatives that only differ in case or punctuation look the same once formatted
+        for _ in range(len(self.alternatives) - 1):
+            text = format_text(self.advance()[0])
+            if text != self.typed:
+                return text
+        return None
+
+
+class NBestCache:
+    # Alternatives for the most recent utterances, so a correction never needs another request
+    def __init__(self, size=20):
+        self.size = size
+        self.entries = OrderedDict()
+        self.ids = itertools.count(1)
+        self.last_typed = None
+        self.lock = threading.Lock()
+
+    def add(self, alternatives):
+        with self.lock:
+            entry = NBestEntry(next(self.ids), list(alternatives))
+            self.entries[entry.entry_id] = entry
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+            return entry.entry_id
+
+    def mark_typed(self, entry_id, text):
+        with self.lock:
+            entry = self.entries.get(entry_id)
+            if entry:
+                entry.typed = text
+            self.last_typed = entry
+
+    def invalidate(self):
+        # Something else was typed since, so the last utterance is no longer at the cursor
+        with self.lock:
+            self.last_typed = None
+
+    def correctable(self):
+        with self.lock:
+            entry = self.last_typed
+            if entry and entry.typed is not None and len(entry.alternatives) > 1:
+                return entry
+            return None
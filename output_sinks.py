@@ -0,0 +1,201 @@
+import json
+import queue
+import socket
+import threading
+import time
+
+import pyperclip
+import pynput.keyboard
+
+
+class OutputSink:
+    def deliver(self, text, final=True, timings=None):
+        raise NotImplementedError
+
+    def replace(self, old_text, new_text):
+        # Sinks that cannot revise what they already delivered ignore corrections
+        pass
+
+    def close(self):
+        pass
+
+
+def backspace_diff(old_text, new_text):
+    # Only the part after the common prefix has to be erased and retyped
+    prefix = 0
+    for old_char, new_char in zip(old_text, new_text):
+        if old_char != new_char:
+            break
+        prefix += 1
+    return len(old_text) - prefix, new_text[prefix:]
+
+def press_backspace(controller, count):
+    for _ in range(count):
+        controller.press(pynput.keyboard.Key.backspace)
+        controller.release(pynput.keyboard.Key.backspace)
+
+
+class KeystrokeSink(OutputSink):
+    def __init__(self, controller, start_delay=0.1, char_delay=0.01):
+        self.controller = controller
+        self.start_delay = start_delay
+        self.char_delay = char_delay
+
+    def deliver(self, text, final=True, timings=None):
+        # Keystrokes cannot be taken back cheaply, so only final text is typed
+        if not final:
+            return
+        time.sleep(self.start_delay)
+
+        for char in text:
+            self.controller.type(char)
+            time.sleep(self.char_delay)
+
+        self.controller.type(' ')
+
+    def replace(self, old_text, new_text):
+        # Give focus time to return to the target window when the correction came from the menu
+        time.sleep(self.start_delay)
+        erase, insert = backspace_diff(old_text + ' ', new_text + ' ')
+        press_backspace(self.controller, erase)
+        for char in insert:
+            self.controller.type(char)
+            time.sleep(self.char_delay)
+
+
+class ClipboardPasteSink(OutputSink):
+    def __init__(self, controller, restore_delay=0.1):
+        self.controller = controller
+        self.restore_delay = restore_delay
+
+    def deliver(self, text, final=True, timings=None):
+        if not final:
+            return
+        self.paste(text + ' ')
+
+    def replace(self, old_text, new_text):
+        erase, insert = backspace_diff(old_text + ' ', new_text + ' ')
+        press_backspace(self.controller, erase)
+        if insert:
+            self.paste(insert)
+
+    def paste(self, text):
+        try:
+            previous = pyperclip.paste()
+        except pyperclip.PyperclipException:
+            previous = None
+
+        # One paste per phrase instead of per word, then hand the clipboard back
+        pyperclip.copy(text)
+        self.controller.press(pynput.keyboard.Key.ctrl)
+        self.controller.press('v')
+        self.controller.release('v')
+        self.controller.release(pynput.keyboard.Key.ctrl)
+
+        if previous is not None:
+            # The target reads the clipboard asynchronously after ctrl+v
+            time.sleep(self.restore_delay)
+            pyperclip.copy(previous)
+
+
+class Subscriber:
+    def __init__(self, connection, on_closed, max_queue=256):
+        self.connection = connection
+        self.on_closed = on_closed
+        self.messages = queue.Queue(maxsize=max_queue)
+        self.thread = threading.Thread(target=self.run, name='publisher', daemon=True)
+        self.thread.start()
+
+    def send(self, message):
+        try:
+            self.messages.put_nowait(message)
+        except queue.Full:
+            # A subscriber that stopped reading must not hold up dictation
+            self.close()
+
+    def run(self):
+        while True:
+            message = self.messages.get()
+            if message is None:
+                break
+            try:
+                self.connection.sendall(message)
+            except OSError:
+                break
+        self.close()
+
+    def close(self):
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+        try:
+            self.messages.put_nowait(None)
+        except queue.Full:
+            pass
+        self.on_closed(self)
+
+
+class SocketPublisherSink(OutputSink):
+    # Publishes newline-delimited JSON to every connected local subscriber
+    def __init__(self, host='127.0.0.1', port=47321, max_queue=256):
+        self.max_queue = max_queue
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.sequence = 0
+
+        self.server = socket.create_server((host, port))
+        self.thread = threading.Thread(target=self.accept_loop, name='publisher-accept', daemon=True)
+        self.thread.start()
+
+    def accept_loop(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = Subscriber(connection, self.remove_subscriber, self.max_queue)
+            with self.lock:
+                self.subscribers.append(subscriber)
+
+    def remove_subscriber(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def publish(self, message):
+        with self.lock:
+            self.sequence += 1
+            message['seq'] = self.sequence
+            subscribers = list(self.subscribers)
+        data = (json.dumps(message) + '\n').encode('utf-8')
+        for subscriber in subscribers:
+            subscriber.send(data)
+
+    def deliver(self, text, final=True, timings=None):
+        self.publish({
+            'type': 'transcript',
+            'text': text,
+            'final': final,
+            'timestamp': time.time(),
+            'timings': timings or {},
+        })
+
+    def replace(self, old_text, new_text):
+        self.publish({
+            'type': 'correction',
+            'text': new_text,
+            'replaces': old_text,
+            'timestamp': time.time(),
+        })
+
+    def close(self):
+        try:
+            self.server.close()
+        except OSError:
+            pass
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
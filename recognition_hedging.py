@@ -0,0 +1,131 @@
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import speech_recognition as sr
+
+
+# Backends return a list of (transcript, confidence) alternatives, best first.
+# Confidence is None when the engine does not report one.
+def recognize_with_google(recognizer, audio, language):
+    try:
+        result = recognizer.recognize_google(audio, language=language, show_all=True)
+    except socket.timeout:
+        # With operation_timeout set, a stalled response read surfaces as a bare timeout
+        raise sr.RequestError('recognition request timed out')
+    if not isinstance(result, dict) or not result.get('alternative'):
+        raise sr.UnknownValueError()
+    return [(alternative['transcript'], alternative.get('confidence'))
+            for alternative in result['alternative'] if 'transcript' in alternative]
+
+def recognize_with_sphinx(recognizer, audio, language):
+    return [(recognizer.recognize_sphinx(audio, language=language), None)]
+
+def recognize_with_whisper(recognizer, audio, language):
+    # Whisper detects the language itself and expects names rather than locale codes.
+    return [(recognizer.recognize_whisper(audio).strip(), None)]
+
+BACKENDS = {
+    'google': recognize_with_google,
+    'sphinx': recognize_with_sphinx,
+    'whisper': recognize_with_whisper,
+}
+
+MIN_LATENCY_SAMPLES = 20
+
+
+class HedgedRecognizer:
+    def __init__(self, recognizer, primary='google', secondary='sphinx', percentile=95,
+                 initial_deadline=1.5, min_deadline=0.3, max_deadline=5.0, window=200):
+        self.recognizer = recognizer
+        self.primary = BACKENDS[primary]
+        self.secondary = BACKENDS[secondary]
+        self.percentile = percentile
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.latencies = deque(maxlen=window)
+        # Separate pools, so stalled primaries can never queue the hedge behind them
+        self.primary_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge-primary')
+        self.secondary_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge-secondary')
+        self.lock = threading.Lock()
+        if recognizer.operation_timeout is None:
+            # Abandoned requests have to end, or they hold a worker for as long as the service stalls
+            recognizer.operation_timeout = max_deadline
+
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    def deadline(self):
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return self.initial_deadline
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100.0))
+        return max(self.min_deadline, min(self.max_deadline, samples[index]))
+
+    def call_primary(self, audio, language):
+        started = time.monotonic()
+        try:
+            result = self.primary(self.recognizer, audio, language)
+        except sr.RequestError:
+            # A failed request says nothing about how long a good answer takes.
+            raise
+        except sr.UnknownValueError:
+            self.record_latency(time.monotonic() - started)
+            raise
+        self.record_latency(time.monotonic() - started)
+        return result
+
+    def record_latency(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def recognize(self, audio, language):
+        with self.lock:
+            self.requests += 1
+
+        primary = self.primary_executor.submit(self.call_primary, audio, language)
+        done, _ = wait([primary], timeout=self.deadline())
+        if done:
+            return primary.result()
+
+        with self.lock:
+            self.hedges_fired += 1
+        secondary = self.secondary_executor.submit(self.secondary, self.recognizer, audio, language)
+
+        pending = {primary, secondary}
+        errors = {}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Prefer the primary when both land in the same wakeup.
+            for future in sorted(done, key=lambda f: f is not primary):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors[future] = e
+                    continue
+                for loser in pending:
+                    # A request already on the wire cannot be interrupted; its answer is dropped.
+                    loser.cancel()
+                if future is secondary:
+                    with self.lock:
+                        self.hedges_won += 1
+                return result
+
+        raise errors.get(primary) or errors[secondary]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'hedges_fired': self.hedges_fired,
+                'hedges_won': self.hedges_won,
+            }
+
+    def shutdown(self):
+        self.primary_executor.shutdown(wait=False)
+        self.secondary_executor.shutdown(wait=False)
@@ -0,0 +1,205 @@
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+
+import speech_recognition as sr
+
+# captured_at, sample_rate, sample_width
+SPOOL_HEADER = struct.Struct('<dIH')
+SPOOL_SUFFIX = '.spool'
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def is_open(self):
+        with self.lock:
+            return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def retry_in(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                # Re-opening after a failed half-open probe restarts the cooldown.
+                self.opened_at = time.monotonic()
+
+
+class RecognitionSpool:
+    def __init__(self, directory, recognize, on_result, base_delay=2.0, max_delay=300.0,
+                 max_items=1000, breaker=None, on_recovered=None):
+        self.directory = directory
+        self.recognize = recognize
+        self.on_result = on_result
+        self.on_recovered = on_recovered
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_items = max_items
+        self.breaker = breaker or CircuitBreaker()
+        self.condition = threading.Condition()
+        self.attempts = 0
+        self.next_attempt = 0.0
+        self.running = True
+        self.thread = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Segments left by an earlier run are never typed, since the window they were meant for is gone.
+        # Without an on_recovered handler they stay on disk for one that has it.
+        self.items = []
+        self.recovered = self.list_items()
+        self.sequence = self.recovered[-1] if self.recovered else 0
+        self.trim()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='spool', daemon=True)
+            self.thread.start()
+
+    def item_path(self, sequence):
+        return os.path.join(self.directory, f"{sequence:010d}{SPOOL_SUFFIX}")
+
+    def list_items(self):
+        items = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SPOOL_SUFFIX):
+                try:
+                    items.append(int(name[:-len(SPOOL_SUFFIX)]))
+                except ValueError:
+                    pass
+        return sorted(items)
+
+    def pending(self):
+        with self.condition:
+            return len(self.items)
+
+    def should_defer(self):
+        # Queue behind earlier failures so recovered text keeps dictation order.
+        return self.pending() > 0 or self.breaker.is_open()
+
+    def add(self, audio, captured_at=None):
+        if captured_at is None:
+            captured_at = time.time()
+        header = SPOOL_HEADER.pack(captured_at, audio.sample_rate, audio.sample_width)
+        blob = header + zlib.compress(audio.get_raw_data(), 6)
+
+        with self.condition:
+            self.sequence += 1
+            sequence = self.sequence
+            path = self.item_path(sequence)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(blob)
+            os.replace(path + '.tmp', path)
+            self.items.append(sequence)
+            self.trim()
+            self.condition.notify()
+        return sequence
+
+    def trim(self):
+        # Leftovers count against the cap too and go first, since nothing may ever collect them
+        while len(self.recovered) + len(self.items) > self.max_items:
+            dropped = (self.recovered or self.items).pop(0)
+            self.remove_item(dropped)
+            print(f"Spool full, dropped segment {dropped}")
+
+    def load_item(self, sequence):
+        with open(self.item_path(sequence), 'rb') as f:
+            data = f.read()
+        captured_at, sample_rate, sample_width = SPOOL_HEADER.unpack_from(data)
+        raw = zlib.decompress(data[SPOOL_HEADER.size:])
+        return sr.AudioData(raw, sample_rate, sample_width), captured_at
+
+    def remove_item(self, sequence):
+        try:
+            os.remove(self.item_path(sequence))
+        except OSError:
+            pass
+
+    def next_item(self):
+        # Current dictation goes first; recovered segments only fill idle time
+        if self.items:
+            return self.items, self.items[0]
+        if self.recovered and self.on_recovered:
+            return self.recovered, self.recovered[0]
+        return None, None
+
+    def wait_for_work(self):
+        with self.condition:
+            while self.running:
+                queue, sequence = self.next_item()
+                if sequence is None:
+                    self.condition.wait()
+                    continue
+                delay = max(self.next_attempt - time.monotonic(), self.breaker.retry_in())
+                if delay <= 0:
+                    return queue, sequence
+                self.condition.wait(delay)
+            return None, None
+
+    def run(self):
+        while True:
+            queue, sequence = self.wait_for_work()
+            if sequence is None:
+                return
+
+            result = None
+            try:
+                audio, captured_at = self.load_item(sequence)
+                result = self.recognize(audio)
+                self.breaker.record_success()
+            except sr.RequestError as e:
+                self.breaker.record_failure()
+                self.schedule_retry()
+                print(f"Spool retry {self.attempts} failed: {e}")
+                continue
+            except sr.UnknownValueError:
+                self.breaker.record_success()
+            except Exception as e:
+                # Unreadable or otherwise unrecoverable; drop it rather than block the queue.
+                print(f"Spool error: {e}")
+
+            with self.condition:
+                self.attempts = 0
+                self.next_attempt = 0.0
+                if queue and queue[0] == sequence:
+                    queue.pop(0)
+            self.remove_item(sequence)
+
+            if not result:
+                continue
+            try:
+                if queue is self.recovered:
+                    self.on_recovered(result, audio, captured_at)
+                else:
+                    self.on_result(result, audio)
+            except Exception as e:
+                # A failing callback must not stop the worker, or everything after it stays queued
+                print(f"Spool delivery error: {e}")
+
+    def schedule_retry(self):
+        with self.condition:
+            self.attempts += 1
+            delay = min(self.max_delay, self.base_delay * (2 ** (self.attempts - 1)))
+            self.next_attempt = time.monotonic() + delay * random.uniform(0.8, 1.2)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
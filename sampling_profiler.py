@@ -0,0 +1,140 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+
+    THREAD_QUERY_LIMITED_INFORMATION = 0x0800
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+
+
+def thread_cpu_time(thread):
+    if hasattr(time, 'pthread_getcpuclockid'):
+        try:
+            return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+        except (OSError, OverflowError):
+            return None
+    if sys.platform == 'win32' and thread.native_id:
+        handle = kernel32.OpenThread(THREAD_QUERY_LIMITED_INFORMATION, False, thread.native_id)
+        if not handle:
+            return None
+        try:
+            creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            if not kernel32.GetThreadTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                           ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+            ticks = sum((t.dwHighDateTime << 32) | t.dwLowDateTime for t in (kernel, user))
+            return ticks / 1e7
+        finally:
+            kernel32.CloseHandle(handle)
+    return None
+
+def thread_cpu_times():
+    times = {}
+    for thread in threading.enumerate():
+        seconds = thread_cpu_time(thread)
+        if seconds is not None:
+            times[thread.ident] = (thread.name, seconds)
+    return times
+
+
+class SamplingProfiler:
+    # Nothing is hooked into the interpreter; when no capture is running there is no cost.
+    def __init__(self, output_dir='profiles', interval=0.01):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, duration, on_finished=None):
+        if self.is_running():
+            return False
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, args=(duration, on_finished),
+                                       name='profiler', daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+
+    def collapse(self, thread_name, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        names.append(thread_name)
+        return ';'.join(reversed(names))
+
+    def run(self, duration, on_finished):
+        own_ident = threading.get_ident()
+        stacks = Counter()
+        samples = Counter()
+        names = {}
+
+        started = time.monotonic()
+        cpu_before = thread_cpu_times()
+        deadline = started + duration
+        while time.monotonic() < deadline and not self.stop_event.is_set():
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                name = names.get(ident, f"thread-{ident}")
+                stacks[self.collapse(name, frame)] += 1
+                samples[ident] += 1
+            self.stop_event.wait(self.interval)
+        cpu_after = thread_cpu_times()
+        elapsed = time.monotonic() - started
+
+        try:
+            paths = self.write(stacks, samples, names, cpu_before, cpu_after, elapsed)
+        except OSError as e:
+            print(f"Profiler error: {e}")
+            paths = None
+        if on_finished:
+            on_finished(paths)
+
+    def write(self, stacks, samples, names, cpu_before, cpu_after, elapsed):
+        os.makedirs(self.output_dir, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime('profile-%Y%m%d-%H%M%S', time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        base = os.path.join(self.output_dir, stamp)
+        suffix = 1
+        # Captures started back to back must not overwrite each other
+        while os.path.exists(base + '.folded'):
+            suffix += 1
+            base = os.path.join(self.output_dir, f"{stamp}-{suffix}")
+
+        folded_path = base + '.folded'
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        threads_path = base + '-threads.txt'
+        rows = []
+        for ident in set(samples) | set(cpu_after):
+            name = cpu_after.get(ident, (names.get(ident, f"thread-{ident}"),))[0]
+            if ident in cpu_after:
+                cpu = cpu_after[ident][1] - cpu_before.get(ident, (name, 0.0))[1]
+                cpu_text = f"{cpu:9.3f}s {100.0 * cpu / elapsed:6.1f}%"
+            else:
+                cpu = -1.0
+                cpu_text = f"{'n/a':>10} {'':>7}"
+            rows.append((cpu, f"{name:<24} {cpu_text} {samples.get(ident, 0):8d}"))
+        with open(threads_path, 'w', encoding='utf-8') as f:
+            f.write(f"Duration: {elapsed:.1f}s, interval: {self.interval * 1000:.0f}ms\n")
+            f.write(f"{'thread':<24} {'cpu':>10} {'cpu%':>7} {'samples':>8}\n")
+            for _, row in sorted(rows, reverse=True):
+                f.write(row + "\n")
+
+        return folded_path, threads_path
@@ -0,0 +1,337 @@
+import os
+import sys
+import csv
+import math
+import array
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QObject, QTimer
+import speech_recognition as sr
+
+import voice_dictation_advanced as dictation
+from output_sinks import KeystrokeSink
+
+PHRASES = [
+    "the quick brown fox jumps over the lazy dog",
+    "please send the report by the end of the day",
+    "meeting moved to three thirty tomorrow",
+    "add milk eggs and bread to the shopping list",
+    "let me know if you have any questions",
+]
+
+METRICS = ['threads', 'rss_mb', 'fds', 'pending_signals']
+
+
+class SyntheticStream:
+    # Alternates tone bursts and near-silence so listen() sees phrase boundaries like real speech
+    def __init__(self, sample_rate, speed, rng):
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.rng = rng
+        self.position = 0
+        self.segment_end = 0
+        self.speaking = False
+        self.chunks = {}
+
+    def chunk(self, size, speaking):
+        key = (size, speaking)
+        if key not in self.chunks:
+            samples = array.array('h')
+            for i in range(size):
+                if speaking:
+                    t = i / float(self.sample_rate)
+                    value = 6000 * math.sin(2 * math.pi * 220 * t) + 2000 * math.sin(2 * math.pi * 660 * t)
+                else:
+                    value = self.rng.uniform(-20, 20)
+                samples.append(int(value))
+            self.chunks[key] = samples.tobytes()
+        return self.chunks[key]
+
+    def read(self, size):
+        if self.position >= self.segment_end:
+            self.speaking = not self.speaking
+            seconds = self.rng.uniform(0.8, 3.0) if self.speaking else self.rng.uniform(0.6, 2.0)
+            self.segment_end = self.position + int(seconds * self.sample_rate)
+        self.position += size
+        time.sleep(size / float(self.sample_rate) / self.speed)
+        return self.chunk(size, self.speaking)
+
+    def close(self):
+        pass
+
+
+class SyntheticMicrophone(sr.AudioSource):
+    def __init__(self, speed=1.0, seed=0):
+        self.SAMPLE_RATE = 16000
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = 1024
+        self.speed = speed
+        self.rng = random.Random(seed)
+        self.stream = None
+
+    def __enter__(self):
+        assert self.stream is None, "This audio source is already inside a context manager"
+        self.stream = SyntheticStream(self.SAMPLE_RATE, self.speed, self.rng)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream.close()
+        self.stream = None
+
+
+class StandInRecognizer(sr.Recognizer):
+    # Answers locally with canned phrases and network-like latency
+    def __init__(self, speed=1.0, seed=0):
+        super().__init__()
+        self.speed = speed
+        self.rng = random.Random(seed)
+
+    def recognize_google(self, audio_data, key=None, language='en-US', pfilter=0, show_all=False, **kwargs):
+        time.sleep(self.rng.uniform(0.2, 0.8) / self.speed)
+        if self.rng.random() < 0.1:
+            if show_all:
+                return []
+            raise sr.UnknownValueError()
+        phrases = self.rng.sample(PHRASES, 3)
+        if show_all:
+            alternatives = [{'transcript': phrase} for phrase in phrases]
+            alternatives[0]['confidence'] = self.rng.uniform(0.6, 0.95)
+            return {'alternative': alternatives, 'final': True}
+        return phrases[0]
+
+    def recognize_sphinx(self, audio_data, language='en-US', **kwargs):
+        return self.recognize_google(audio_data, language=language)
+
+
+class NullKeyboard:
+    def type(self, text):
+        pass
+
+    def press(self, key):
+        pass
+
+    def release(self, key):
+        pass
+
+
+class SignalCounter(QObject):
+    # Emissions are counted in the emitting thread, deliveries on the Qt thread once queued events run
+    def __init__(self, signals):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.emitted = 0
+        self.delivered = 0
+        for signal in signals:
+            signal.connect(self.on_emitted, Qt.DirectConnection)
+            signal.connect(self.on_delivered)
+
+    def on_emitted(self, *args):
+        with self.lock:
+            self.emitted += 1
+
+    def on_delivered(self, *args):
+        with self.lock:
+            self.delivered += 1
+
+    def pending(self):
+        with self.lock:
+            return self.emitted - self.delivered
+
+
+def rss_megabytes():
+    if os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1048576.0
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize / 1048576.0
+        return None
+    import resource
+    # Peak rather than current RSS, but it still only ever grows when memory leaks
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1048576.0 if sys.platform == 'darwin' else 1024.0)
+
+def open_handles():
+    if os.path.isdir('/proc/self/fd'):
+        return len(os.listdir('/proc/self/fd'))
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+        count = wintypes.DWORD()
+        if ctypes.windll.kernel32.GetProcessHandleCount(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                        ctypes.byref(count)):
+            return count.value
+    return None
+
+def growth(samples, metric):
+    points = [(s['elapsed'], s[metric]) for s in samples if s[metric] is not None]
+    if len(points) < 2:
+        return None
+    n = float(len(points))
+    mean_t = sum(t for t, _ in points) / n
+    mean_v = sum(v for _, v in points) / n
+    variance = sum((t - mean_t) ** 2 for t, _ in points)
+    if variance == 0:
+        return 0.0
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / variance
+    # Projected change across the measured window, in the metric's own units
+    return slope * (points[-1][0] - points[0][0])
+
+
+class SoakDriver(QObject):
+    def __init__(self, app, widget, args):
+        super().__init__()
+        self.app = app
+        self.widget = widget
+        self.args = args
+        self.counter = SignalCounter([widget.signals.text_ready, widget.signals.status_update])
+        self.samples = []
+        self.cycle = 0
+        self.started = time.monotonic()
+        self.deadline = self.started + args.hours * 3600 / args.speed
+
+        self.sample_timer = QTimer()
+        self.sample_timer.timeout.connect(self.sample)
+        self.sample_timer.start(int(args.sample_interval * 1000))
+        QTimer.singleShot(0, self.start_cycle)
+
+    def start_cycle(self):
+        if time.monotonic() >= self.deadline:
+            self.finish()
+            return
+        self.cycle += 1
+        if self.cycle % self.args.settings_every == 0:
+            self.save_settings()
+        self.widget.start_recording()
+        QTimer.singleShot(int(self.args.talk_seconds * 1000 / self.args.speed), self.stop_cycle)
+
+    def stop_cycle(self):
+        self.widget.stop_recording()
+        QTimer.singleShot(int(self.args.pause_seconds * 1000 / self.args.speed), self.start_cycle)
+
+    def save_settings(self):
+        dialog = dictation.SettingsDialog(self.widget.config_manager, self.widget)
+        dialog.save_settings()
+        dialog.deleteLater()
+        self.widget.apply_settings()
+
+    def sample(self):
+        sample = {
+            'elapsed': time.monotonic() - self.started,
+            'threads': threading.active_count(),
+            'rss_mb': rss_megabytes(),
+            'fds': open_handles(),
+            'pending_signals': self.counter.pending(),
+        }
+        self.samples.append(sample)
+        print(f"[{sample['elapsed']:8.0f}s] cycle {self.cycle}: " +
+              ", ".join(f"{metric}={sample[metric]}" for metric in METRICS))
+
+    def finish(self):
+        self.sample_timer.stop()
+        self.widget.stop_recording()
+        self.app.exit(self.report())
+
+    def report(self):
+        with open(self.args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['elapsed'] + METRICS)
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+        steady = self.samples[int(len(self.samples) * self.args.warmup):]
+        if len(steady) < 10:
+            print(f"Not enough samples after warm-up ({len(steady)}); run longer or sample more often")
+            return 2
+
+        limits = {
+            'threads': self.args.max_thread_growth,
+            'rss_mb': self.args.max_rss_growth_mb,
+            'fds': self.args.max_fd_growth,
+            'pending_signals': self.args.max_pending_growth,
+        }
+        failed = False
+        for metric in METRICS:
+            change = growth(steady, metric)
+            if change is None:
+                print(f"{metric:<16} not available on this platform")
+                continue
+            verdict = 'FAIL' if change > limits[metric] else 'ok'
+            failed = failed or verdict == 'FAIL'
+            print(f"{metric:<16} trend {change:+10.2f} (limit {limits[metric]:+.2f})  {verdict}")
+        print(f"Samples written to {self.args.csv}")
+        return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive the advanced app against synthetic speech and '
+                                                 'fail if threads, memory, handles or queued signals keep growing.')
+    parser.add_argument('--hours', type=float, default=1.0, help='hours of synthetic speech to feed')
+    parser.add_argument('--speed', type=float, default=1.0, help='play synthetic audio this many times faster')
+    parser.add_argument('--talk-seconds', type=float, default=20.0, help='recording length per cycle')
+    parser.add_argument('--pause-seconds', type=float, default=3.0, help='gap between recordings')
+    parser.add_argument('--settings-every', type=int, default=5, help='save settings every N cycles')
+    parser.add_argument('--sample-interval', type=float, default=10.0, help='seconds between samples')
+    parser.add_argument('--warmup', type=float, default=0.2, help='fraction of samples ignored as warm-up')
+    parser.add_argument('--max-thread-growth', type=float, default=2.0)
+    parser.add_argument('--max-rss-growth-mb', type=float, default=20.0)
+    parser.add_argument('--max-fd-growth', type=float, default=5.0)
+    parser.add_argument('--max-pending-growth', type=float, default=10.0)
+    parser.add_argument('--csv', default=os.path.abspath('soak_samples.csv'), help='where to write the samples')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep-workdir', action='store_true',
+                        help='keep the scratch folder with history, spool and settings after the run')
+    args = parser.parse_args()
+
+    # History, spool and settings saves all go to a scratch folder instead of the user's files
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='speaktype-soak-')
+    os.chdir(workdir)
+    print(f"Working directory: {workdir}")
+
+    app = QApplication(sys.argv[:1])
+    widget = dictation.FloatingWidget(
+        config_manager=dictation.ConfigManager(os.path.join(workdir, 'config.json')),
+        recognizer=StandInRecognizer(args.speed, args.seed),
+        microphone=SyntheticMicrophone(args.speed, args.seed)
+    )
+    widget.keyboard_controller = NullKeyboard()
+    # Typing delays run on the Qt thread, so they are sped up along with the audio
+    widget.output_sinks = [KeystrokeSink(widget.keyboard_controller, start_delay=0.1 / args.speed,
+                                         char_delay=0.01 / args.speed)]
+    driver = SoakDriver(app, widget, args)
+
+    status = app.exec_()
+    # Release the history and spool files before removing them
+    widget.close()
+    if widget.recognition_thread:
+        widget.recognition_thread.join(5)
+    os.chdir(original_dir)
+    if args.keep_workdir:
+        print(f"Kept working directory: {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(status)
+
+if __name__ == '__main__':
+    main()
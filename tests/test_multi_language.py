@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+import speech_recognition as sr
+
+from multi_language import LanguageSelector, top_confidence
+
+
+class FakeService:
+    # Answers per language with a fixed confidence and delay, and records what was asked
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, audio, language):
+        with self.lock:
+            self.calls.append(language)
+        answer = self.answers[language]
+        if answer == 'hang':
+            self.release.wait(5)
+            raise sr.RequestError('timed out')
+        delay, result = answer
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return [(f'{language} text', result)]
+
+
+def make_selector(answers, **kwargs):
+    service = FakeService(answers)
+    options = dict(deadline=1.0, confident=0.85, sticky_after=3, sticky_confidence=0.8, probe_every=10)
+    options.update(kwargs)
+    return LanguageSelector(service, list(answers), **options), service
+
+
+class TestLanguageSelector:
+    def test_top_confidence(self):
+        """Test a missing confidence counts as zero."""
+        assert top_confidence([('a', 0.7), ('b', 0.2)]) == 0.7
+        assert top_confidence([('a', None)]) == 0.0
+        assert top_confidence([]) == 0.0
+
+    def test_picks_most_confident(self):
+        """Test the language with the highest confidence wins."""
+        selector, service = make_selector({'en-US': (0.0, 0.5), 'es-ES': (0.05, 0.7)})
+        language, alternatives = selector.recognize(None)
+        assert language == 'es-ES'
+        assert alternatives == [('es-ES text', 0.7)]
+        selector.shutdown()
+
+    def test_confident_answer_stops_waiting(self):
+        """Test a confident answer is returned without waiting for slower languages."""
+        selector, service = make_selector({'en-US': (0.0, 0.95), 'es-ES': (0.8, 0.99)})
+        started = time.monotonic()
+        language, _ = selector.recognize(None)
+        assert language == 'en-US'
+        assert time.monotonic() - started < 0.5
+        selector.shutdown()
+
+    def test_deadline_drops_slow_languages(self):
+        """Test languages slower than the deadline are ignored."""
+        selector, service = make_selector({'en-US': (0.0, 0.4), 'es-ES': 'hang'}, deadline=0.2)
+        started = time.monotonic()
+        language, _ = selector.recognize(None)
+        assert language == 'en-US'
+        assert time.monotonic() - started < 1.0
+        service.release.set()
+        selector.shutdown()
+
+    def test_nothing_understood(self):
+        """Test UnknownValueError is raised when no language understood the audio."""
+        selector, _ = make_selector({'en-US': (0.0, sr.UnknownValueError()),
+                                     'es-ES': (0.0, sr.RequestError('offline'))})
+        with pytest.raises(sr.UnknownValueError):
+            selector.recognize(None)
+        selector.shutdown()
+
+    def test_outage_reported(self):
+        """Test RequestError is raised only when every language failed to reach the service."""
+        selector, _ = make_selector({'en-US': (0.0, sr.RequestError('offline')),
+                                     'es-ES': (0.0, sr.RequestError('offline'))})
+        with pytest.raises(sr.RequestError):
+            selector.recognize(None)
+        selector.shutdown()
+
+    def test_becomes_sticky(self):
+        """Test only the winning language is asked after enough confident wins."""
+        selector, service = make_selector({'en-US': (0.0, 0.9), 'es-ES': (0.0, 0.3)}, confident=0.95)
+        for _ in range(3):
+            assert selector.recognize(None)[0] == 'en-US'
+        assert selector.sticky_language() == 'en-US'
+        service.calls.clear()
+        assert selector.recognize(None)[0] == 'en-US'
+        assert service.calls == ['en-US']
+        selector.shutdown()
+
+    def test_low_confidence_fans_out_again(self):
+        """Test a weak answer in the sticky language brings the other languages back."""
+        answers = {'en-US': (0.0, 0.9), 'es-ES': (0.0, 0.3)}
+        selector, service = make_selector(answers, confident=0.95)
+        for _ in range(3):
+            selector.recognize(None)
+        answers['en-US'] = (0.0, 0.5)
+        answers['es-ES'] = (0.0, 0.9)
+        service.calls.clear()
+        assert selector.recognize(None)[0] == 'es-ES'
+        assert sorted(service.calls) == ['en-US', 'es-ES']
+        assert selector.sticky_language() is None
+        selector.shutdown()
+
+    def test_probes_periodically(self):
+        """Test all languages are asked again every probe_every segments."""
+        selector, service = make_selector({'en-US': (0.0, 0.9), 'es-ES': (0.0, 0.3)},
+                                          confident=0.95, probe_every=2)
+        for _ in range(3):
+            selector.recognize(None)
+        service.calls.clear()
+        for _ in range(3):
+            selector.recognize(None)
+        assert service.calls.count('es-ES') == 1
+        selector.shutdown()
+
+    def test_hung_sticky_language_falls_back(self):
+        """Test a sticky request that never answers is abandoned at the deadline."""
+        answers = {'en-US': (0.0, 0.9), 'es-ES': (0.0, 0.3)}
+        selector, service = make_selector(answers, deadline=0.2, confident=0.95)
+        for _ in range(3):
+            selector.recognize(None)
+        answers['en-US'] = 'hang'
+        started = time.monotonic()
+        assert selector.recognize(None)[0] == 'es-ES'
+        assert time.monotonic() - started < 1.0
+        service.release.set()
+        selector.shutdown()
+
+    def test_empty_alternatives_count_as_nothing_understood(self):
+        """Test a language that returns no alternatives is skipped rather than raising."""
+        answers = {'en-US': (0.0, 0.6), 'es-ES': (0.0, 0.9)}
+        selector, service = make_selector(answers)
+        original = service.__call__
+
+        def recognize(audio, language):
+            if language == 'es-ES':
+                return []
+            return original(audio, language)
+
+        selector.recognize_language = recognize
+        assert selector.recognize(None)[0] == 'en-US'
+
+        selector.recognize_language = lambda audio, language: []
+        with pytest.raises(sr.UnknownValueError):
+            selector.recognize(None)
+        selector.shutdown()
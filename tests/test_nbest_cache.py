@@ -0,0 +1,73 @@
+from nbest_cache import NBestCache
+
+
+def format_text(text):
+    if text and text[-1] not in '.!?':
+        text += '.'
+    return text.capitalize()
+
+
+class TestNBestCache:
+    def test_oldest_entries_evicted(self):
+        """Test only the most recent utterances are kept."""
+        cache = NBestCache(size=2)
+        first = cache.add([('one', 0.9)])
+        second = cache.add([('two', 0.9)])
+        third = cache.add([('three', 0.9)])
+        assert list(cache.entries) == [second, third]
+        assert first not in cache.entries
+
+    def test_correctable_after_mark_typed(self):
+        """Test the last typed utterance with alternatives can be corrected."""
+        cache = NBestCache()
+        entry_id = cache.add([('write', 0.8), ('right', 0.1)])
+        assert cache.correctable() is None
+        cache.mark_typed(entry_id, 'Write.')
+        entry = cache.correctable()
+        assert entry.entry_id == entry_id
+        assert entry.typed == 'Write.'
+
+    def test_single_alternative_not_correctable(self):
+        """Test an utterance without other guesses offers no correction."""
+        cache = NBestCache()
+        cache.mark_typed(cache.add([('only', 0.9)]), 'Only.')
+        assert cache.correctable() is None
+
+    def test_invalidate(self):
+        """Test other typed text makes the last utterance uncorrectable."""
+        cache = NBestCache()
+        cache.mark_typed(cache.add([('write', 0.8), ('right', 0.1)]), 'Write.')
+        cache.invalidate()
+        assert cache.correctable() is None
+
+    def test_evicted_entry_not_correctable(self):
+        """Test marking an entry that was already evicted clears the correction target."""
+        cache = NBestCache(size=1)
+        old = cache.add([('write', 0.8), ('right', 0.1)])
+        cache.add([('new', 0.9), ('knew', 0.1)])
+        cache.mark_typed(old, 'Write.')
+        assert cache.correctable() is None
+
+
+class TestNBestEntry:
+    def test_advance_wraps_around(self):
+        """Test cycling through alternatives returns to the first one."""
+        cache = NBestCache()
+        entry = cache.entries[cache.add([('a', 0.5), ('b', 0.3), ('c', 0.2)])]
+        assert [entry.advance()[0] for _ in range(3)] == ['b', 'c', 'a']
+
+    def test_next_distinct_skips_lookalikes(self):
+        """Test alternatives that only differ in case or punctuation are skipped."""
+        cache = NBestCache()
+        entry_id = cache.add([('write it', 0.8), ('Write it.', 0.1), ('write it', 0.05), ('right it', 0.05)])
+        cache.mark_typed(entry_id, 'Write it.')
+        entry = cache.correctable()
+        assert entry.next_distinct(format_text) == 'Right it.'
+        assert entry.index == 3
+
+    def test_next_distinct_none_when_all_look_the_same(self):
+        """Test no correction is offered when every alternative formats the same."""
+        cache = NBestCache()
+        entry_id = cache.add([('hello', 0.8), ('Hello', 0.1), ('hello.', 0.1)])
+        cache.mark_typed(entry_id, 'Hello.')
+        assert cache.correctable().next_distinct(format_text) is None
@@ -0,0 +1,198 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+import output_sinks
+from output_sinks import ClipboardPasteSink, KeystrokeSink, SocketPublisherSink, backspace_diff
+
+
+class RecordingController:
+    def __init__(self):
+        self.events = []
+
+    def type(self, text):
+        self.events.append(('type', text))
+
+    def press(self, key):
+        self.events.append(('press', key))
+
+    def release(self, key):
+        self.events.append(('release', key))
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def publisher():
+    sink = SocketPublisherSink(port=0, max_queue=4)
+    yield sink
+    sink.close()
+
+
+def connect(sink):
+    before = len(sink.subscribers)
+    client = socket.create_connection(sink.server.getsockname()[:2])
+    assert wait_until(lambda: len(sink.subscribers) > before)
+    return client
+
+
+def read_messages(client, count):
+    client.settimeout(5)
+    stream = client.makefile('r', encoding='utf-8')
+    return [json.loads(stream.readline()) for _ in range(count)]
+
+
+class TestSocketPublisherSink:
+    def test_transcript_and_correction_lines(self, publisher):
+        """Test subscribers get one JSON object per line with a running sequence number."""
+        client = connect(publisher)
+        publisher.deliver('hello world', True, {'recognition_seconds': 0.4})
+        publisher.deliver('partial', False)
+        publisher.replace('hello world', 'yellow world')
+
+        transcript, partial, correction = read_messages(client, 3)
+        assert transcript['type'] == 'transcript'
+        assert transcript['text'] == 'hello world'
+        assert transcript['final'] is True
+        assert transcript['timings'] == {'recognition_seconds': 0.4}
+        assert partial['final'] is False
+        assert partial['timings'] == {}
+        assert correction == {'type': 'correction', 'text': 'yellow world', 'replaces': 'hello world',
+                              'timestamp': correction['timestamp'], 'seq': 3}
+        assert [transcript['seq'], partial['seq']] == [1, 2]
+        client.close()
+
+    def test_every_subscriber_gets_messages(self, publisher):
+        """Test all connected subscribers receive the same message."""
+        first = connect(publisher)
+        second = connect(publisher)
+        publisher.deliver('both', True)
+        assert read_messages(first, 1)[0]['text'] == 'both'
+        assert read_messages(second, 1)[0]['text'] == 'both'
+        first.close()
+        second.close()
+
+    def test_stalled_subscriber_dropped(self, publisher):
+        """Test a subscriber that stops reading is disconnected instead of holding up delivery."""
+        stalled = connect(publisher)
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stalled_subscriber = publisher.subscribers[0]
+        reader = connect(publisher)
+        received = []
+
+        def drain():
+            try:
+                while True:
+                    data = reader.recv(65536)
+                    if not data:
+                        return
+                    received.append(len(data))
+            except OSError:
+                pass
+
+        threading.Thread(target=drain, daemon=True).start()
+
+        text = 'x' * 256 * 1024
+        for _ in range(200):
+            publisher.deliver(text, True)
+            if stalled_subscriber not in publisher.subscribers:
+                break
+            time.sleep(0.005)
+        assert wait_until(lambda: stalled_subscriber not in publisher.subscribers)
+        assert len(publisher.subscribers) == 1
+        assert received
+        stalled.close()
+        reader.close()
+
+    def test_disconnected_subscriber_removed(self, publisher):
+        """Test a subscriber that hangs up is removed on the next send."""
+        client = connect(publisher)
+        client.close()
+        assert wait_until(lambda: (publisher.deliver('ping', True), not publisher.subscribers)[1])
+
+
+class TestClipboardPasteSink:
+    def test_pastes_phrase_and_restores_clipboard(self, monkeypatch):
+        """Test the phrase is pasted with Ctrl+V and the previous clipboard comes back."""
+        clipboard = ['previous contents']
+        copies = []
+        monkeypatch.setattr(output_sinks.pyperclip, 'paste', lambda: clipboard[-1])
+        monkeypatch.setattr(output_sinks.pyperclip, 'copy', lambda text: (copies.append(text), clipboard.append(text)))
+
+        controller = RecordingController()
+        ClipboardPasteSink(controller, restore_delay=0).deliver('Hello there.')
+
+        assert copies == ['Hello there. ', 'previous contents']
+        key = output_sinks.pynput.keyboard.Key
+        assert controller.events == [('press', key.ctrl), ('press', 'v'), ('release', 'v'), ('release', key.ctrl)]
+
+    def test_unreadable_clipboard_not_restored(self, monkeypatch):
+        """Test nothing is written back when the old clipboard could not be read."""
+        copies = []
+
+        def paste():
+            raise output_sinks.pyperclip.PyperclipException('no clipboard')
+
+        monkeypatch.setattr(output_sinks.pyperclip, 'paste', paste)
+        monkeypatch.setattr(output_sinks.pyperclip, 'copy', copies.append)
+        ClipboardPasteSink(RecordingController(), restore_delay=0).deliver('Hi.')
+        assert copies == ['Hi. ']
+
+    def test_partial_text_not_pasted(self, monkeypatch):
+        """Test only final text reaches the focused window."""
+        copies = []
+        monkeypatch.setattr(output_sinks.pyperclip, 'copy', copies.append)
+        controller = RecordingController()
+        ClipboardPasteSink(controller).deliver('partial', final=False)
+        assert copies == []
+        assert controller.events == []
+
+
+class TestKeystrokeSink:
+    def test_types_final_text_with_space(self):
+        """Test each character is typed, followed by a space."""
+        controller = RecordingController()
+        KeystrokeSink(controller, start_delay=0, char_delay=0).deliver('Hi.')
+        assert controller.events == [('type', 'H'), ('type', 'i'), ('type', '.'), ('type', ' ')]
+
+    def test_partial_text_not_typed(self):
+        """Test partial text is never typed."""
+        controller = RecordingController()
+        KeystrokeSink(controller, start_delay=0, char_delay=0).deliver('partial', final=False)
+        assert controller.events == []
+
+
+class TestBackspaceDiff:
+    def test_only_differing_end_replaced(self):
+        """Test the common prefix is kept and only the rest is erased and retyped."""
+        assert backspace_diff('I went to the see. ', 'I went to the sea. ') == (3, 'a. ')
+
+    def test_identical_text(self):
+        """Test identical text needs no edits."""
+        assert backspace_diff('same ', 'same ') == (0, '')
+
+    def test_nothing_in_common(self):
+        """Test completely different text is erased and typed in full."""
+        assert backspace_diff('abc', 'xyz') == (3, 'xyz')
+
+    def test_new_text_extends_old(self):
+        """Test a longer replacement only appends."""
+        assert backspace_diff('Write', 'Writer') == (0, 'r')
+
+    def test_keystroke_replace(self):
+        """Test the keystroke sink presses Backspace for the differing end and types the new end."""
+        controller = RecordingController()
+        KeystrokeSink(controller, start_delay=0, char_delay=0).replace('Write.', 'Right.')
+        key = output_sinks.pynput.keyboard.Key
+        backspace = [('press', key.backspace), ('release', key.backspace)]
+        assert controller.events == backspace * 7 + [('type', c) for c in 'Right. ']
@@ -0,0 +1,162 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+import speech_recognition as sr
+
+import recognition_hedging
+from recognition_hedging import HedgedRecognizer, MIN_LATENCY_SAMPLES
+
+
+def answer(text, delay=0.0):
+    def backend(recognizer, audio, language):
+        time.sleep(delay)
+        return [(text, None)]
+    return backend
+
+
+def fail(error, delay=0.0):
+    def backend(recognizer, audio, language):
+        time.sleep(delay)
+        raise error
+    return backend
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    def register(**named):
+        for name, backend in named.items():
+            monkeypatch.setitem(recognition_hedging.BACKENDS, name, backend)
+    return register
+
+
+class TestHedgedRecognizer:
+    def test_initial_deadline_until_enough_samples(self, backends):
+        """Test the fixed deadline is used until enough latencies are recorded."""
+        backends(primary=answer('a'), secondary=answer('b'))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', initial_deadline=1.5)
+        for _ in range(MIN_LATENCY_SAMPLES - 1):
+            hedger.record_latency(0.5)
+        assert hedger.deadline() == 1.5
+        hedger.record_latency(0.5)
+        assert hedger.deadline() == 0.5
+        hedger.shutdown()
+
+    def test_deadline_percentile_and_limits(self, backends):
+        """Test the deadline follows the percentile and stays within min and max."""
+        backends(primary=answer('a'), secondary=answer('b'))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', percentile=90,
+                                  min_deadline=0.3, max_deadline=5.0)
+        for i in range(100):
+            hedger.record_latency((i + 1) / 100.0)
+        assert hedger.deadline() == pytest.approx(0.91)
+
+        hedger.latencies.clear()
+        for _ in range(100):
+            hedger.record_latency(0.01)
+        assert hedger.deadline() == 0.3
+
+        hedger.latencies.clear()
+        for _ in range(100):
+            hedger.record_latency(60.0)
+        assert hedger.deadline() == 5.0
+        hedger.shutdown()
+
+    def test_fast_primary_is_not_hedged(self, backends):
+        """Test a primary that answers before the deadline is used on its own."""
+        calls = []
+        backends(primary=answer('primary'),
+                 secondary=lambda recognizer, audio, language: calls.append(language))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', initial_deadline=0.5)
+        assert hedger.recognize(None, 'en-US') == [('primary', None)]
+        assert calls == []
+        assert hedger.stats() == {'requests': 1, 'hedges_fired': 0, 'hedges_won': 0}
+        hedger.shutdown()
+
+    def test_slow_primary_loses_to_secondary(self, backends):
+        """Test the secondary answer is used when it arrives first after the deadline."""
+        backends(primary=answer('primary', 0.5), secondary=answer('secondary'))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', initial_deadline=0.05)
+        assert hedger.recognize(None, 'en-US') == [('secondary', None)]
+        assert hedger.stats() == {'requests': 1, 'hedges_fired': 1, 'hedges_won': 1}
+        hedger.shutdown()
+
+    def test_slow_primary_still_wins_if_first(self, backends):
+        """Test a hedge that fires but loses is counted as fired, not won."""
+        backends(primary=answer('primary', 0.1), secondary=answer('secondary', 0.5))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', initial_deadline=0.05)
+        assert hedger.recognize(None, 'en-US') == [('primary', None)]
+        assert hedger.stats() == {'requests': 1, 'hedges_fired': 1, 'hedges_won': 0}
+        hedger.shutdown()
+
+    def test_primary_preferred_when_both_finish_together(self, backends, monkeypatch):
+        """Test the primary answer is used when both are done at the same wakeup."""
+        backends(primary=answer('primary', 0.2), secondary=answer('secondary'))
+        # Waiting for all futures makes both land in the same wakeup
+        monkeypatch.setattr(recognition_hedging, 'wait',
+                            lambda futures, timeout=None, return_when=None:
+                            concurrent.futures.wait(futures, timeout=timeout))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', initial_deadline=0.05)
+        assert hedger.recognize(None, 'en-US') == [('primary', None)]
+        assert hedger.stats()['hedges_won'] == 0
+        hedger.shutdown()
+
+    def test_secondary_answer_used_when_primary_fails(self, backends):
+        """Test a primary error after the deadline falls back to the secondary."""
+        backends(primary=fail(sr.RequestError('primary down'), 0.1), secondary=answer('secondary', 0.2))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', initial_deadline=0.05)
+        assert hedger.recognize(None, 'en-US') == [('secondary', None)]
+        hedger.shutdown()
+
+    def test_primary_error_raised_when_both_fail(self, backends):
+        """Test the primary's error is reported when neither backend answers."""
+        backends(primary=fail(sr.RequestError('primary down'), 0.1),
+                 secondary=fail(sr.UnknownValueError()))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', initial_deadline=0.05)
+        with pytest.raises(sr.RequestError, match='primary down'):
+            hedger.recognize(None, 'en-US')
+        hedger.shutdown()
+
+    def test_failed_requests_not_recorded_as_latency(self, backends):
+        """Test only answered or understood-nothing requests feed the deadline."""
+        backends(primary=fail(sr.RequestError('down')), secondary=answer('b'))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary')
+        with pytest.raises(sr.RequestError):
+            hedger.recognize(None, 'en-US')
+        assert len(hedger.latencies) == 0
+        hedger.shutdown()
+
+    def test_sets_operation_timeout(self, backends):
+        """Test abandoned requests are bounded when the recognizer has no timeout."""
+        backends(primary=answer('a'), secondary=answer('b'))
+        recognizer = sr.Recognizer()
+        hedger = HedgedRecognizer(recognizer, 'primary', 'secondary', max_deadline=4.0)
+        assert recognizer.operation_timeout == 4.0
+        hedger.shutdown()
+
+        recognizer.operation_timeout = 10.0
+        hedger = HedgedRecognizer(recognizer, 'primary', 'secondary', max_deadline=4.0)
+        assert recognizer.operation_timeout == 10.0
+        hedger.shutdown()
+
+    def test_hung_primaries_do_not_block_secondary(self, backends):
+        """Test every call returns when the primary never answers."""
+        release = threading.Event()
+
+        def hang(recognizer, audio, language):
+            release.wait(10)
+            return [('late', None)]
+
+        backends(primary=hang, secondary=answer('secondary'))
+        hedger = HedgedRecognizer(sr.Recognizer(), 'primary', 'secondary', initial_deadline=0.05)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(hedger.recognize(None, 'en-US')))
+                   for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        release.set()
+        assert results == [[('secondary', None)]] * 12
+        hedger.shutdown()
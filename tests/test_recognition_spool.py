@@ -0,0 +1,233 @@
+import os
+import time
+
+import pytest
+import speech_recognition as sr
+
+import recognition_spool
+from recognition_spool import CircuitBreaker, RecognitionSpool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(recognition_spool.time, 'monotonic', fake)
+    return fake
+
+
+def make_audio(marker):
+    return sr.AudioData(bytes([marker]) * 320, 16000, 2)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self, clock):
+        """Test the breaker stays closed until enough failures in a row."""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+        breaker.record_failure()
+        breaker.record_failure()
+        assert not breaker.is_open()
+        breaker.record_failure()
+        assert breaker.is_open()
+        assert breaker.retry_in() == 30.0
+
+    def test_success_resets_failures(self, clock):
+        """Test a success in between failures keeps the breaker closed."""
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert not breaker.is_open()
+
+    def test_half_open_after_timeout(self, clock):
+        """Test the breaker lets a probe through once the cooldown has passed."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+        breaker.record_failure()
+        clock.now += 4.0
+        assert breaker.is_open()
+        assert breaker.retry_in() == 6.0
+        clock.now += 6.0
+        assert not breaker.is_open()
+        assert breaker.retry_in() == 0.0
+
+    def test_failed_probe_restarts_cooldown(self, clock):
+        """Test a failure after the cooldown opens the breaker for a full timeout again."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+        breaker.record_failure()
+        clock.now += 10.0
+        breaker.record_failure()
+        assert breaker.is_open()
+        assert breaker.retry_in() == 10.0
+
+
+class TestRecognitionSpool:
+    def test_backoff_doubles_up_to_max(self, tmp_path, clock, monkeypatch):
+        """Test retry delays grow exponentially and are capped at max_delay."""
+        monkeypatch.setattr(recognition_spool.random, 'uniform', lambda low, high: 1.0)
+        spool = RecognitionSpool(str(tmp_path), None, None, base_delay=2.0, max_delay=10.0)
+        delays = []
+        for _ in range(5):
+            spool.schedule_retry()
+            delays.append(spool.next_attempt - clock.now)
+        assert delays == [2.0, 4.0, 8.0, 10.0, 10.0]
+
+    def test_backoff_is_jittered(self, tmp_path, clock):
+        """Test retry delays stay within 20% of the nominal delay."""
+        spool = RecognitionSpool(str(tmp_path), None, None, base_delay=2.0)
+        spool.schedule_retry()
+        assert 1.6 <= spool.next_attempt - clock.now <= 2.4
+
+    def test_items_survive_on_disk(self, tmp_path):
+        """Test queued audio is written to disk and read back intact."""
+        spool = RecognitionSpool(str(tmp_path), None, None)
+        sequence = spool.add(make_audio(7), captured_at=1234.5)
+        audio, captured_at = spool.load_item(sequence)
+        assert audio.get_raw_data() == make_audio(7).get_raw_data()
+        assert captured_at == 1234.5
+        assert spool.pending() == 1
+        assert spool.should_defer()
+
+    def test_oldest_dropped_when_full(self, tmp_path):
+        """Test the spool keeps at most max_items segments."""
+        spool = RecognitionSpool(str(tmp_path), None, None, max_items=2)
+        first = spool.add(make_audio(1))
+        spool.add(make_audio(2))
+        spool.add(make_audio(3))
+        assert spool.pending() == 2
+        assert not os.path.exists(spool.item_path(first))
+
+    def test_worker_not_started_by_constructor(self, tmp_path):
+        """Test nothing is recognized until start() is called."""
+        calls = []
+        spool = RecognitionSpool(str(tmp_path), lambda audio: calls.append(audio) or 'text', lambda r, a: None)
+        spool.add(make_audio(1))
+        time.sleep(0.1)
+        assert calls == []
+        spool.start()
+        assert wait_until(lambda: calls)
+        spool.stop()
+
+    def test_retries_in_order_after_errors(self, tmp_path):
+        """Test failed segments are retried and delivered in the order they were added."""
+        failures = [True, True]
+        delivered = []
+
+        def recognize(audio):
+            if failures:
+                failures.pop()
+                raise sr.RequestError('offline')
+            return audio.get_raw_data()[0]
+
+        spool = RecognitionSpool(str(tmp_path), recognize, lambda result, audio: delivered.append(result),
+                                 base_delay=0.01, breaker=CircuitBreaker(failure_threshold=5))
+        for marker in (1, 2, 3):
+            spool.add(make_audio(marker))
+        spool.start()
+        assert wait_until(lambda: len(delivered) == 3)
+        assert delivered == [1, 2, 3]
+        assert spool.pending() == 0
+        assert os.listdir(str(tmp_path)) == []
+        spool.stop()
+
+    def test_unrecognizable_segment_is_dropped(self, tmp_path):
+        """Test a segment nobody can understand does not block the queue."""
+        delivered = []
+
+        def recognize(audio):
+            if audio.get_raw_data()[0] == 1:
+                raise sr.UnknownValueError()
+            return 'ok'
+
+        spool = RecognitionSpool(str(tmp_path), recognize, lambda result, audio: delivered.append(result))
+        spool.add(make_audio(1))
+        spool.add(make_audio(2))
+        spool.start()
+        assert wait_until(lambda: delivered == ['ok'])
+        spool.stop()
+
+    def test_leftovers_go_to_on_recovered(self, tmp_path):
+        """Test segments from an earlier run are never passed to on_result."""
+        RecognitionSpool(str(tmp_path), None, None).add(make_audio(1), captured_at=50.0)
+
+        results = []
+        recovered = []
+        spool = RecognitionSpool(str(tmp_path), lambda audio: 'old', lambda r, a: results.append(r),
+                                 on_recovered=lambda r, a, captured_at: recovered.append((r, captured_at)))
+        assert spool.pending() == 0
+        assert not spool.should_defer()
+        spool.start()
+        assert wait_until(lambda: recovered)
+        assert recovered == [('old', 50.0)]
+        assert results == []
+        spool.stop()
+
+    def test_leftovers_kept_without_handler(self, tmp_path):
+        """Test leftovers stay on disk when nothing can take them."""
+        RecognitionSpool(str(tmp_path), None, None).add(make_audio(1))
+
+        calls = []
+        spool = RecognitionSpool(str(tmp_path), lambda audio: calls.append(audio) or 'text', lambda r, a: None)
+        spool.start()
+        new = spool.add(make_audio(2))
+        assert wait_until(lambda: len(calls) == 1)
+        time.sleep(0.1)
+        assert len(calls) == 1
+        assert len(os.listdir(str(tmp_path))) == 1
+        assert new == 2
+        spool.stop()
+
+    def test_failing_callback_does_not_stop_worker(self, tmp_path):
+        """Test an exception in on_result leaves the worker running for later segments."""
+        delivered = []
+
+        def on_result(result, audio):
+            if result == 1:
+                raise IndexError('bad result')
+            delivered.append(result)
+
+        spool = RecognitionSpool(str(tmp_path), lambda audio: audio.get_raw_data()[0], on_result)
+        spool.start()
+        spool.add(make_audio(1))
+        spool.add(make_audio(2))
+        assert wait_until(lambda: delivered == [2])
+        assert spool.thread.is_alive()
+        assert spool.pending() == 0
+        assert not spool.should_defer()
+        spool.stop()
+
+    def test_leftovers_capped_at_startup(self, tmp_path):
+        """Test only the newest max_items leftovers are kept from earlier runs."""
+        earlier = RecognitionSpool(str(tmp_path), None, None)
+        for marker in range(5):
+            earlier.add(make_audio(marker))
+
+        spool = RecognitionSpool(str(tmp_path), None, None, max_items=3)
+        assert spool.recovered == [3, 4, 5]
+        assert len(os.listdir(str(tmp_path))) == 3
+
+    def test_leftovers_dropped_before_new_segments(self, tmp_path):
+        """Test new segments push out leftovers first when the spool is full."""
+        RecognitionSpool(str(tmp_path), None, None).add(make_audio(1))
+
+        spool = RecognitionSpool(str(tmp_path), None, None, max_items=2)
+        spool.add(make_audio(2))
+        spool.add(make_audio(3))
+        assert spool.recovered == []
+        assert spool.items == [2, 3]
+        assert sorted(os.listdir(str(tmp_path))) == [os.path.basename(spool.item_path(n)) for n in (2, 3)]
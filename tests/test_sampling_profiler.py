@@ -0,0 +1,64 @@
+import os
+import threading
+
+from sampling_profiler import SamplingProfiler
+
+
+def spin(stop):
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+    return total
+
+
+def capture(profiler, duration=0.2):
+    finished = threading.Event()
+    result = []
+    assert profiler.start(duration, lambda paths: (result.append(paths), finished.set()))
+    assert finished.wait(5)
+    return result[0]
+
+
+class TestSamplingProfiler:
+    def test_capture_includes_busy_thread(self, tmp_path):
+        """Test a busy named thread shows up in both the stacks and the thread table."""
+        stop = threading.Event()
+        worker = threading.Thread(target=spin, args=(stop,), name='busy-worker', daemon=True)
+        worker.start()
+        try:
+            folded_path, threads_path = capture(SamplingProfiler(str(tmp_path), interval=0.005))
+        finally:
+            stop.set()
+            worker.join()
+
+        with open(folded_path, encoding='utf-8') as f:
+            stacks = [line.rsplit(' ', 1) for line in f.read().splitlines()]
+        busy = [(stack, int(count)) for stack, count in stacks if stack.startswith('busy-worker;')]
+        assert busy
+        assert any('spin (test_sampling_profiler.py:' in stack for stack, _ in busy)
+        assert all(count > 0 for _, count in busy)
+        assert not any(stack.startswith('profiler;') for stack, _ in stacks)
+
+        with open(threads_path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines[0].startswith('Duration:')
+        assert any(line.startswith('busy-worker') for line in lines[2:])
+
+    def test_only_one_capture_at_a_time(self, tmp_path):
+        """Test a second start is refused while a capture is running."""
+        profiler = SamplingProfiler(str(tmp_path))
+        finished = threading.Event()
+        assert profiler.start(5, lambda paths: finished.set())
+        assert profiler.is_running()
+        assert not profiler.start(5)
+        profiler.stop()
+        assert finished.wait(5)
+
+    def test_back_to_back_captures_kept(self, tmp_path):
+        """Test captures started within the same second get separate files."""
+        profiler = SamplingProfiler(str(tmp_path), interval=0.005)
+        first = capture(profiler, 0.01)
+        second = capture(profiler, 0.01)
+        third = capture(profiler, 0.01)
+        assert len({first[0], second[0], third[0]}) == 3
+        assert len(os.listdir(str(tmp_path))) == 6
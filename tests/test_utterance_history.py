@@ -0,0 +1,101 @@
+import os
+
+import speech_recognition as sr
+
+from utterance_history import UtteranceHistory, RECORD_HEADER
+
+
+def make_audio(seconds=0.1, sample_rate=16000):
+    # Noise keeps the compressed size close to the raw size
+    return sr.AudioData(os.urandom(int(sample_rate * seconds) * 2), sample_rate, 2)
+
+
+class TestUtteranceHistory:
+    def test_append_and_last(self, tmp_path):
+        """Test recent entries come back oldest first."""
+        history = UtteranceHistory(str(tmp_path))
+        for text in ['one', 'two', 'three']:
+            history.append(make_audio(), text)
+        assert [entry.text for entry in history.last(2)] == ['two', 'three']
+        assert history.last(0) == []
+        history.close()
+
+    def test_index_reloaded_after_restart(self, tmp_path):
+        """Test transcripts survive closing and reopening the history."""
+        history = UtteranceHistory(str(tmp_path))
+        history.append(make_audio(), 'hello world', recognition_seconds=0.5)
+        history.close()
+
+        reopened = UtteranceHistory(str(tmp_path))
+        entry = reopened.last()[0]
+        assert entry.text == 'hello world'
+        assert abs(entry.recognition_seconds - 0.5) < 1e-6
+        reopened.close()
+
+    def test_read_audio_round_trip(self, tmp_path):
+        """Test audio is stored as 16 kHz 16-bit PCM and read back intact."""
+        history = UtteranceHistory(str(tmp_path))
+        audio = make_audio(0.25)
+        entry = history.append(audio, 'audio')
+        raw, sample_rate, sample_width = history.read_audio(entry)
+        assert (sample_rate, sample_width) == (16000, 2)
+        assert raw == audio.get_raw_data()
+        assert abs(entry.audio_seconds - 0.25) < 1e-6
+        history.close()
+
+    def test_truncated_record_is_dropped(self, tmp_path):
+        """Test a half-written record from a crash is cut off on reopen."""
+        history = UtteranceHistory(str(tmp_path))
+        history.append(make_audio(), 'complete')
+        history.append(make_audio(), 'interrupted')
+        history.close()
+
+        path = os.path.join(str(tmp_path), 'history-000001.log')
+        size = os.path.getsize(path)
+        with open(path, 'r+b') as f:
+            f.truncate(size - 10)
+
+        reopened = UtteranceHistory(str(tmp_path))
+        assert [entry.text for entry in reopened.last(5)] == ['complete']
+        reopened.append(make_audio(), 'after crash')
+        reopened.close()
+
+        reopened = UtteranceHistory(str(tmp_path))
+        assert [entry.text for entry in reopened.last(5)] == ['complete', 'after crash']
+        reopened.close()
+
+    def test_truncated_header_is_dropped(self, tmp_path):
+        """Test a crash inside the record header leaves earlier records readable."""
+        history = UtteranceHistory(str(tmp_path))
+        entry = history.append(make_audio(), 'complete')
+        history.close()
+
+        path = os.path.join(str(tmp_path), 'history-000001.log')
+        with open(path, 'ab') as f:
+            f.write(b'UTT1' + b'\x00' * (RECORD_HEADER.size // 2))
+
+        reopened = UtteranceHistory(str(tmp_path))
+        assert [e.text for e in reopened.last(5)] == ['complete']
+        assert os.path.getsize(path) > entry.offset
+        reopened.close()
+
+    def test_oldest_segments_evicted(self, tmp_path):
+        """Test the folder stays under max_bytes by removing whole old segments."""
+        history = UtteranceHistory(str(tmp_path), max_bytes=64 * 1024, segment_bytes=16 * 1024)
+        for i in range(40):
+            history.append(make_audio(0.2), f'phrase {i}')
+        total = sum(os.path.getsize(os.path.join(str(tmp_path), name)) for name in os.listdir(str(tmp_path)))
+        assert total <= 64 * 1024
+        texts = [entry.text for entry in history.last(100)]
+        assert texts[-1] == 'phrase 39'
+        assert 'phrase 0' not in texts
+        history.close()
+
+    def test_search_is_case_insensitive_and_newest_first(self, tmp_path):
+        """Test search matches substrings regardless of case."""
+        history = UtteranceHistory(str(tmp_path))
+        for text in ['Send the Report', 'lunch at noon', 'report is done']:
+            history.append(make_audio(), text)
+        assert [entry.text for entry in history.search('REPORT')] == ['report is done', 'Send the Report']
+        assert [entry.text for entry in history.search('report', limit=1)] == ['report is done']
+        history.close()
@@ -0,0 +1,179 @@
+import math
+import random
+import struct
+import threading
+
+from wake_word import (WakeWordDetector, WakeWordListener, extract_features, dtw_distance,
+                       calibrate_threshold, save_templates, load_templates)
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds, frequencies, amplitude, rng):
+    samples = []
+    count = int(SAMPLE_RATE * seconds)
+    for n in range(count):
+        # Sweep through the given frequencies so the word has some shape over time
+        frequency = frequencies[min(len(frequencies) - 1, n * len(frequencies) // count)]
+        envelope = math.sin(math.pi * n / count)
+        samples.append(amplitude * envelope * math.sin(2 * math.pi * frequency * n / SAMPLE_RATE)
+                       + rng.gauss(0, 30))
+    return samples
+
+
+def noise(seconds, rng, level=30):
+    return [rng.gauss(0, level) for _ in range(int(SAMPLE_RATE * seconds))]
+
+
+def pcm(samples):
+    return struct.pack(f'<{len(samples)}h', *(max(-32768, min(32767, int(s))) for s in samples))
+
+
+def word(rng, stretch=1.0):
+    return tone(0.6 * stretch, [300, 900, 2500, 600], 8000, rng)
+
+
+def other_word(rng):
+    return tone(0.6, [3000, 200, 3000, 200], 8000, rng)
+
+
+def make_detector(rng):
+    templates = [extract_features(pcm(word(rng, stretch)), SAMPLE_RATE, 2) for stretch in (0.9, 1.0, 1.1)]
+    return WakeWordDetector(templates, calibrate_threshold(templates, 1.5))
+
+
+class FakeStream:
+    def __init__(self, data, on_end):
+        self.data = data
+        self.offset = 0
+        self.on_end = on_end
+
+    def read(self, size):
+        chunk = self.data[self.offset:self.offset + size * 2]
+        self.offset += size * 2
+        if len(chunk) < size * 2:
+            self.on_end()
+            chunk += b'\x00' * (size * 2 - len(chunk))
+        return chunk
+
+
+class FakeMicrophone:
+    CHUNK = 1024
+    SAMPLE_RATE = SAMPLE_RATE
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, data):
+        self.finished = threading.Event()
+        self.stream = FakeStream(data, self.finished.set)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def listen(detector, data, throttled):
+    woke = threading.Event()
+    microphone = FakeMicrophone(data)
+
+    def on_wake():
+        woke.set()
+        microphone.finished.set()
+
+    # A zero budget measured on every chunk keeps the listener at its heaviest throttling
+    listener = WakeWordListener(microphone, detector, on_wake,
+                                cpu_budget=0.0 if throttled else 1.0,
+                                budget_window=1e-6 if throttled else 60.0)
+    listener.start()
+    microphone.finished.wait(10)
+    listener.stop().join(5)
+    return woke.is_set()
+
+
+class TestFeatures:
+    def test_silence_has_no_features(self):
+        """Test all-zero input yields no features instead of raising."""
+        assert extract_features(b'\x00' * 32000, SAMPLE_RATE, 2) == []
+        assert extract_features(b'', SAMPLE_RATE, 2) == []
+
+    def test_silence_is_trimmed(self):
+        """Test leading and trailing silence does not change the template length much."""
+        rng = random.Random(1)
+        bare = extract_features(pcm(word(rng)), SAMPLE_RATE, 2)
+        padded = extract_features(pcm(noise(0.5, rng) + word(rng) + noise(0.5, rng)), SAMPLE_RATE, 2)
+        assert abs(len(padded) - len(bare)) <= 3
+
+    def test_dtw_distance(self):
+        """Test DTW is zero for identical input and tolerates stretching."""
+        rng = random.Random(2)
+        a = extract_features(pcm(word(rng)), SAMPLE_RATE, 2)
+        b = extract_features(pcm(word(rng, 1.2)), SAMPLE_RATE, 2)
+        c = extract_features(pcm(other_word(rng)), SAMPLE_RATE, 2)
+        assert dtw_distance(a, a) == 0.0
+        assert dtw_distance(a, b) < dtw_distance(a, c)
+
+    def test_dtw_rejects_very_different_lengths(self):
+        """Test a segment more than twice as long as the template never matches."""
+        assert dtw_distance([[0, 0, 0]] * 10, [[0, 0, 0]] * 25) == float('inf')
+        assert dtw_distance([], [[0, 0, 0]]) == float('inf')
+
+    def test_calibrate_threshold(self):
+        """Test the threshold scales the mean distance between templates."""
+        rng = random.Random(3)
+        templates = [extract_features(pcm(word(rng, stretch)), SAMPLE_RATE, 2) for stretch in (0.9, 1.1)]
+        distance = dtw_distance(templates[0], templates[1])
+        assert abs(calibrate_threshold(templates, 2.0) - 2.0 * distance) < 1e-9
+        assert calibrate_threshold(templates[:1]) is None
+
+    def test_templates_round_trip(self, tmp_path):
+        """Test templates and threshold are saved and loaded unchanged."""
+        path = str(tmp_path / 'wake_word.json')
+        save_templates(path, [[[1.0, 2.0, 3.0]]], 0.5)
+        assert load_templates(path) == ([[[1.0, 2.0, 3.0]]], 0.5)
+
+
+class TestWakeWordDetector:
+    def test_detects_word(self):
+        """Test the trained word triggers after a quiet lead-in."""
+        rng = random.Random(4)
+        detector = make_detector(rng)
+        audio = pcm(noise(1.0, rng) + word(rng) + noise(0.6, rng))
+        assert detector.process(audio, SAMPLE_RATE, 2)
+
+    def test_ignores_other_word(self):
+        """Test a different sound of similar length does not trigger."""
+        rng = random.Random(5)
+        detector = make_detector(rng)
+        audio = pcm(noise(1.0, rng) + other_word(rng) + noise(0.6, rng))
+        assert not detector.process(audio, SAMPLE_RATE, 2)
+
+    def test_ignores_silence(self):
+        """Test background noise alone never triggers."""
+        rng = random.Random(6)
+        detector = make_detector(rng)
+        assert not detector.process(pcm(noise(3.0, rng)), SAMPLE_RATE, 2)
+
+
+class TestWakeWordListener:
+    def test_detects_word_unthrottled(self):
+        """Test the listener wakes on the trained word."""
+        rng = random.Random(7)
+        data = pcm(noise(1.0, rng) + word(rng) + noise(1.0, rng))
+        assert listen(make_detector(rng), data, throttled=False)
+
+    def test_detects_word_while_throttled(self):
+        """Test skipping work to stay under the CPU budget still lets the word through."""
+        rng = random.Random(8)
+        data = pcm(noise(1.0, rng) + word(rng) + noise(1.0, rng))
+        assert listen(make_detector(rng), data, throttled=True)
+
+    def test_skips_quiet_chunks(self):
+        """Test quiet audio is skipped but a word in progress never is."""
+        rng = random.Random(9)
+        detector = make_detector(rng)
+        detector.process(pcm(noise(0.5, rng)), SAMPLE_RATE, 2)
+        assert detector.skip_if_quiet(pcm(noise(0.1, rng)), SAMPLE_RATE, 2)
+        assert not detector.skip_if_quiet(pcm(word(rng)[:1600]), SAMPLE_RATE, 2)
+        detector.process(pcm(word(rng)[:3200]), SAMPLE_RATE, 2)
+        assert not detector.skip_if_quiet(pcm(noise(0.1, rng)), SAMPLE_RATE, 2)
@@ -0,0 +1,186 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque, namedtuple
+
+# magic, captured_at, audio_seconds, recognition_seconds, sample_rate, sample_width, text_len, audio_len
+RECORD_HEADER = struct.Struct('<4sdffIHII')
+RECORD_MAGIC = b'UTT1'
+SEGMENT_PREFIX = 'history-'
+SEGMENT_SUFFIX = '.log'
+STORED_SAMPLE_RATE = 16000
+STORED_SAMPLE_WIDTH = 2
+
+HistoryEntry = namedtuple('HistoryEntry', [
+    'segment', 'offset', 'captured_at', 'audio_seconds', 'recognition_seconds', 'text'
+])
+
+
+class UtteranceHistory:
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, segment_bytes=4 * 1024 * 1024, index_size=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = min(segment_bytes, max_bytes)
+        self.index = deque(maxlen=index_size)
+        self.lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.segments = self.list_segments()
+        if not self.segments:
+            self.segments.append(1)
+        self.load_index()
+        self.active = open(self.segment_path(self.segments[-1]), 'ab')
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}")
+
+    def list_segments(self):
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    segments.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    pass
+        return sorted(segments)
+
+    def scan_segment(self, segment, end=None):
+        # Reads headers and transcripts only; compressed audio is skipped with a seek.
+        entries = []
+        valid_end = 0
+        try:
+            with open(self.segment_path(segment), 'rb') as f:
+                if end is None:
+                    end = os.fstat(f.fileno()).st_size
+                while valid_end + RECORD_HEADER.size <= end:
+                    header = f.read(RECORD_HEADER.size)
+                    magic, captured_at, audio_seconds, recognition_seconds, _, _, text_len, audio_len = \
+                        RECORD_HEADER.unpack(header)
+                    record_end = valid_end + RECORD_HEADER.size + text_len + audio_len
+                    if magic != RECORD_MAGIC or record_end > end:
+                        break
+                    text = f.read(text_len).decode('utf-8', errors='replace')
+                    entries.append(HistoryEntry(segment, valid_end, captured_at, audio_seconds,
+                                                recognition_seconds, text))
+                    f.seek(audio_len, os.SEEK_CUR)
+                    valid_end = record_end
+        except FileNotFoundError:
+            pass
+        return entries, valid_end
+
+    def load_index(self):
+        newest = self.segments[-1]
+        entries, valid_end = self.scan_segment(newest)
+        path = self.segment_path(newest)
+        if os.path.exists(path) and os.path.getsize(path) > valid_end:
+            # Drop a record left half-written by a crash so appends stay parseable.
+            with open(path, 'r+b') as f:
+                f.truncate(valid_end)
+
+        collected = [entries]
+        count = len(entries)
+        for segment in reversed(self.segments[:-1]):
+            if count >= self.index.maxlen:
+                break
+            entries, _ = self.scan_segment(segment)
+            collected.append(entries)
+            count += len(entries)
+
+        for entries in reversed(collected):
+            self.index.extend(entries)
+
+    def append(self, audio, text, recognition_seconds=0.0, captured_at=None):
+        raw = audio.get_raw_data(convert_rate=STORED_SAMPLE_RATE, convert_width=STORED_SAMPLE_WIDTH)
+        audio_blob = zlib.compress(raw, 6)
+        text_blob = text.encode('utf-8')
+        audio_seconds = len(raw) / float(STORED_SAMPLE_RATE * STORED_SAMPLE_WIDTH)
+        if captured_at is None:
+            captured_at = time.time()
+
+        header = RECORD_HEADER.pack(RECORD_MAGIC, captured_at, audio_seconds, recognition_seconds,
+                                    STORED_SAMPLE_RATE, STORED_SAMPLE_WIDTH, len(text_blob), len(audio_blob))
+
+        with self.lock:
+            offset = self.active.tell()
+            self.active.write(header + text_blob + audio_blob)
+            self.active.flush()
+            entry = HistoryEntry(self.segments[-1], offset, captured_at, audio_seconds, recognition_seconds, text)
+            self.index.append(entry)
+
+            if self.active.tell() >= self.segment_bytes:
+                self.roll_segment()
+            self.evict()
+
+        return entry
+
+    def roll_segment(self):
+        self.active.close()
+        self.segments.append(self.segments[-1] + 1)
+        self.active = open(self.segment_path(self.segments[-1]), 'ab')
+
+    def evict(self):
+        total = 0
+        sizes = {}
+        for segment in self.segments:
+            try:
+                sizes[segment] = os.path.getsize(self.segment_path(segment))
+            except OSError:
+                sizes[segment] = 0
+            total += sizes[segment]
+
+        evicted = set()
+        while total > self.max_bytes and len(self.segments) > 1:
+            oldest = self.segments[0]
+            try:
+                os.remove(self.segment_path(oldest))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Still open by a concurrent search; try again on the next append.
+                break
+            self.segments.pop(0)
+            evicted.add(oldest)
+            total -= sizes[oldest]
+
+        if evicted:
+            kept = [entry for entry in self.index if entry.segment not in evicted]
+            self.index.clear()
+            self.index.extend(kept)
+
+    def last(self, count=1):
+        with self.lock:
+            if count <= 0:
+                return []
+            return list(self.index)[-count:]
+
+    def search(self, query, limit=50):
+        query = query.lower()
+        with self.lock:
+            segments = list(self.segments)
+            active_end = self.active.tell()
+
+        results = []
+        for segment in reversed(segments):
+            end = active_end if segment == segments[-1] else None
+            entries, _ = self.scan_segment(segment, end)
+            for entry in reversed(entries):
+                if query in entry.text.lower():
+                    results.append(entry)
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def read_audio(self, entry):
+        with open(self.segment_path(entry.segment), 'rb') as f:
+            f.seek(entry.offset)
+            _, _, _, _, sample_rate, sample_width, text_len, audio_len = \
+                RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            f.seek(text_len, os.SEEK_CUR)
+            raw = zlib.decompress(f.read(audio_len))
+        return raw, sample_rate, sample_width
+
+    def close(self):
+        with self.lock:
+            self.active.close()
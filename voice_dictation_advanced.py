@@ -1,11 +1,12 @@
 import sys
 import json
+import argparse
 import threading
 import queue
 import time
 from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout, QMenu, 
                              QDialog, QLabel, QComboBox, 
-                             QSpinBox, QHBoxLayout, QCheckBox)
+                             QSpinBox, QHBoxLayout, QCheckBox, QLineEdit, QListWidget, QInputDialog)
 from PyQt5.QtCore import Qt, QPoint, pyqtSignal, QObject
 from PyQt5.QtGui import QIcon, QPixmap, QPainter, QBrush, QColor
 import speech_recognition as sr
@@ -14,18 +15,40 @@ import keyboard
 from pystray import MenuItem as item
 import pystray
 from PIL import Image, ImageDraw
+from utterance_history import UtteranceHistory
+from recognition_hedging import HedgedRecognizer, BACKENDS
+from recognition_spool import RecognitionSpool, CircuitBreaker
+from sampling_profiler import SamplingProfiler
+from output_sinks import KeystrokeSink, ClipboardPasteSink, SocketPublisherSink
+from wake_word import (WakeWordDetector, WakeWordListener, extract_features, calibrate_threshold,
+                       save_templates, load_templates)
+from nbest_cache import NBestCache
+from multi_language import LanguageSelector
+
+WAKE_WORD_SAMPLES = 3
+MODIFIER_KEYS = ('ctrl', 'shift', 'alt', 'alt gr', 'windows')
+MODIFIER_RELEASE_TIMEOUT = 2.0
 
 class ConfigManager:
-    def __init__(self):
-        self.config_file = 'config.json'
+    def __init__(self, config_file='config.json'):
+        self.config_file = config_file
         self.config = self.load_config()
         
     def load_config(self):
+        config = self.get_default_config()
         try:
             with open(self.config_file, 'r') as f:
-                return json.load(f)
+                self.merge_config(config, json.load(f))
         except:
-            return self.get_default_config()
+            pass
+        return config
+        
+    def merge_config(self, base, overrides):
+        for key, value in overrides.items():
+            if isinstance(value, dict) and isinstance(base.get(key), dict):
+                self.merge_config(base[key], value)
+            else:
+                base[key] = value
             
     def save_config(self):
         with open(self.config_file, 'w') as f:
@@ -45,6 +68,64 @@ class ConfigManager:
                 "timeout": 1,
                 "phrase_time_limit": 10,
                 "energy_threshold": 300
+            },
+            "history": {
+                "enabled": True,
+                "directory": "history",
+                "max_megabytes": 50,
+                "segment_megabytes": 4,
+                "index_size": 256,
+                "retype_hotkey": "ctrl+shift+r"
+            },
+            "hedging": {
+                "enabled": False,
+                "primary_backend": "google",
+                "secondary_backend": "sphinx",
+                "percentile": 95,
+                "initial_deadline": 1.5,
+                "min_deadline": 0.3,
+                "max_deadline": 5.0
+            },
+            "spool": {
+                "enabled": True,
+                "directory": "spool",
+                "base_delay": 2.0,
+                "max_delay": 300.0,
+                "failure_threshold": 3,
+                "reset_timeout": 30.0,
+                "max_items": 1000
+            },
+            "profiler": {
+                "duration": 30,
+                "interval_ms": 10,
+                "output_dir": "profiles"
+            },
+            "output": {
+                "sinks": ["keyboard"],
+                "publish_host": "127.0.0.1",
+                "publish_port": 47321
+            },
+            "wake_word": {
+                "enabled": False,
+                "templates_file": "wake_word.json",
+                "sensitivity": 1.5,
+                "cpu_budget": 0.02,
+                "idle_timeout": 10
+            },
+            "nbest": {
+                "enabled": True,
+                "cache_size": 20,
+                "correct_hotkey": "ctrl+shift+f2",
+                "correct_command": "correct that"
+            },
+            "multi_language": {
+                "enabled": False,
+                "languages": ["en-US", "es-ES"],
+                "deadline": 3.0,
+                "confident": 0.85,
+                "sticky_after": 3,
+                "sticky_confidence": 0.8,
+                "probe_every": 10
             }
         }
 
@@ -56,7 +137,7 @@ class SettingsDialog(QDialog):
         
     def init_ui(self):
         self.setWindowTitle('Settings')
-        self.setFixedSize(400, 300)
+        self.setFixedSize(400, 390)
         
         layout = QVBoxLayout()
         
@@ -68,6 +149,18 @@ class SettingsDialog(QDialog):
         lang_layout.addWidget(self.lang_combo)
         layout.addLayout(lang_layout)
         
+        multi_config = self.config_manager.config['multi_language']
+        self.multi_lang_check = QCheckBox('Recognize several languages at once')
+        self.multi_lang_check.setChecked(multi_config['enabled'])
+        layout.addWidget(self.multi_lang_check)
+        
+        languages_layout = QHBoxLayout()
+        languages_layout.addWidget(QLabel('Languages:'))
+        self.languages_edit = QLineEdit(', '.join(multi_config['languages']))
+        self.languages_edit.setPlaceholderText('en-US, es-ES')
+        languages_layout.addWidget(self.languages_edit)
+        layout.addLayout(languages_layout)
+        
         self.auto_punct_check = QCheckBox('Auto Punctuation')
         self.auto_punct_check.setChecked(self.config_manager.config['auto_punctuation'])
         layout.addWidget(self.auto_punct_check)
@@ -88,6 +181,10 @@ class SettingsDialog(QDialog):
         phrase_layout.addWidget(self.phrase_spin)
         layout.addLayout(phrase_layout)
         
+        self.wake_word_check = QCheckBox('Wake word (listen while idle)')
+        self.wake_word_check.setChecked(self.config_manager.config['wake_word']['enabled'])
+        layout.addWidget(self.wake_word_check)
+        
         button_layout = QHBoxLayout()
         save_btn = QPushButton('Save')
         save_btn.clicked.connect(self.save_settings)
@@ -104,29 +201,108 @@ class SettingsDialog(QDialog):
         self.config_manager.config['auto_punctuation'] = self.auto_punct_check.isChecked()
         self.config_manager.config['recognition']['timeout'] = self.timeout_spin.value()
         self.config_manager.config['recognition']['phrase_time_limit'] = self.phrase_spin.value()
+        self.config_manager.config['wake_word']['enabled'] = self.wake_word_check.isChecked()
+        languages = [code.strip() for code in self.languages_edit.text().split(',') if code.strip()]
+        self.config_manager.config['multi_language']['enabled'] = self.multi_lang_check.isChecked() and len(languages) > 1
+        if languages:
+            self.config_manager.config['multi_language']['languages'] = languages
         self.config_manager.save_config()
         self.accept()
 
+class HistoryDialog(QDialog):
+    def __init__(self, history, on_retype, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.on_retype = on_retype
+        self.results = []
+        self.init_ui()
+        
+    def init_ui(self):
+        self.setWindowTitle('History')
+        self.setFixedSize(400, 300)
+        
+        layout = QVBoxLayout()
+        
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('Search transcripts...')
+        self.search_edit.returnPressed.connect(self.run_search)
+        layout.addWidget(self.search_edit)
+        
+        self.result_list = QListWidget()
+        self.result_list.itemDoubleClicked.connect(self.retype_selected)
+        layout.addWidget(self.result_list)
+        
+        button_layout = QHBoxLayout()
+        type_btn = QPushButton('Type')
+        type_btn.clicked.connect(self.retype_selected)
+        close_btn = QPushButton('Close')
+        close_btn.clicked.connect(self.reject)
+        button_layout.addWidget(type_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+        self.run_search()
+        
+    def run_search(self):
+        self.results = self.history.search(self.search_edit.text())
+        self.result_list.clear()
+        for entry in self.results:
+            stamp = time.strftime('%H:%M', time.localtime(entry.captured_at))
+            self.result_list.addItem(f"{stamp}  {entry.text}")
+            
+    def retype_selected(self, *args):
+        row = self.result_list.currentRow()
+        if 0 <= row < len(self.results):
+            self.accept()
+            self.on_retype(self.results[row].text)
+
 class SignalEmitter(QObject):
-    text_ready = pyqtSignal(str)
+    text_ready = pyqtSignal(str, dict)
     status_update = pyqtSignal(str)
+    wake_detected = pyqtSignal()
+    correction_requested = pyqtSignal()
+    idle_timeout = pyqtSignal()
 
 class FloatingWidget(QWidget):
-    def __init__(self):
+    def __init__(self, config_manager=None, recognizer=None, microphone=None):
         super().__init__()
-        self.config_manager = ConfigManager()
+        self.config_manager = config_manager or ConfigManager()
         self.is_recording = False
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.recording_session = 0
+        self.recognition_thread = None
+        self.hotkey_handles = []
+        self.recognizer = recognizer or sr.Recognizer()
+        self.microphone = microphone or sr.Microphone()
         self.audio_queue = queue.Queue()
         self.keyboard_controller = pynput.keyboard.Controller()
         self.signals = SignalEmitter()
         self.signals.text_ready.connect(self.type_text)
         self.signals.status_update.connect(self.update_status)
+        self.signals.wake_detected.connect(self.on_wake_word)
+        self.signals.idle_timeout.connect(self.stop_recording)
+        self.signals.correction_requested.connect(self.correct_last)
+        self.history = self.create_history()
+        self.hedger = self.create_hedger()
+        # Taken after the hedger, which may set its own timeout
+        self.default_operation_timeout = self.recognizer.operation_timeout
+        self.profiler = None
+        self.output_sinks = self.create_output_sinks()
+        self.nbest = NBestCache(self.config_manager.config['nbest']['cache_size']) \
+            if self.config_manager.config['nbest']['enabled'] else None
+        self.language_selector = self.create_language_selector()
+        self.wake_listener = None
+        self.wake_started = False
+        self.training_wake_word = False
+        # The spool worker calls back into recognition and delivery, so it comes last
+        self.spool = self.create_spool()
         
         self.init_ui()
         self.init_speech_recognition()
         self.setup_hotkey()
+        if self.spool:
+            self.spool.start()
+        self.start_idle_listening()
         
     def init_ui(self):
         self.setWindowTitle('Voice Dictation')
@@ -159,6 +335,28 @@ class FloatingWidget(QWidget):
         
     def show_context_menu(self, position):
         menu = QMenu()
+        if self.history:
+            retype_action = menu.addAction("Re-type Last")
+            retype_action.triggered.connect(lambda: self.retype_last())
+            retype_many_action = menu.addAction("Re-type Last N...")
+            retype_many_action.triggered.connect(self.prompt_retype_last)
+            history_action = menu.addAction("History...")
+            history_action.triggered.connect(self.show_history)
+        if self.nbest:
+            correct_action = menu.addAction("Correct That")
+            correct_action.setEnabled(self.nbest.correctable() is not None)
+            correct_action.triggered.connect(self.correct_last)
+        if self.hedger:
+            stats = self.hedger.stats()
+            hedging_action = menu.addAction(
+                f"Hedged {stats['hedges_fired']} of {stats['requests']}, fallback won {stats['hedges_won']}")
+            hedging_action.setEnabled(False)
+        train_action = menu.addAction("Train Wake Word...")
+        train_action.setEnabled(not self.is_recording and not self.training_wake_word)
+        train_action.triggered.connect(self.train_wake_word)
+        profile_action = menu.addAction("Profile")
+        profile_action.setEnabled(not (self.profiler and self.profiler.is_running()))
+        profile_action.triggered.connect(lambda: self.start_profiler())
         settings_action = menu.addAction("Settings")
         settings_action.triggered.connect(self.show_settings)
         exit_action = menu.addAction("Exit")
@@ -168,8 +366,207 @@ class FloatingWidget(QWidget):
     def show_settings(self):
         dialog = SettingsDialog(self.config_manager, self)
         if dialog.exec_():
-            self.init_speech_recognition()
-            self.setup_hotkey()
+            self.apply_settings()
+            
+    def apply_settings(self):
+        # Nothing in the dialog affects ambient calibration, so the microphone is not reopened here
+        self.recognizer.energy_threshold = self.config_manager.config['recognition']['energy_threshold']
+        if self.language_selector:
+            self.language_selector.shutdown()
+        self.language_selector = self.create_language_selector()
+        self.setup_hotkey()
+        
+        # The new listener must wait for the old one to release the microphone
+        previous = self.stop_idle_listening()
+        self.wake_listener = None
+        self.start_idle_listening(previous)
+        
+    def create_language_selector(self):
+        multi_config = self.config_manager.config['multi_language']
+        if not multi_config['enabled'] or len(multi_config['languages']) < 2:
+            self.recognizer.operation_timeout = self.default_operation_timeout
+            return None
+        # Requests abandoned at the deadline would otherwise hold a worker until the service answers
+        self.recognizer.operation_timeout = multi_config['deadline']
+        return LanguageSelector(
+            self.recognize_alternatives,
+            multi_config['languages'],
+            deadline=multi_config['deadline'],
+            confident=multi_config['confident'],
+            sticky_after=multi_config['sticky_after'],
+            sticky_confidence=multi_config['sticky_confidence'],
+            probe_every=multi_config['probe_every']
+        )
+            
+    def create_history(self):
+        history_config = self.config_manager.config['history']
+        if not history_config['enabled']:
+            return None
+        try:
+            return UtteranceHistory(
+                history_config['directory'],
+                max_bytes=history_config['max_megabytes'] * 1024 * 1024,
+                segment_bytes=history_config['segment_megabytes'] * 1024 * 1024,
+                index_size=history_config['index_size']
+            )
+        except Exception as e:
+            print(f"History initialization error: {e}")
+            return None
+            
+    def create_hedger(self):
+        hedging_config = self.config_manager.config['hedging']
+        if not hedging_config['enabled']:
+            return None
+        try:
+            return HedgedRecognizer(
+                self.recognizer,
+                primary=hedging_config['primary_backend'],
+                secondary=hedging_config['secondary_backend'],
+                percentile=hedging_config['percentile'],
+                initial_deadline=hedging_config['initial_deadline'],
+                min_deadline=hedging_config['min_deadline'],
+                max_deadline=hedging_config['max_deadline']
+            )
+        except Exception as e:
+            print(f"Hedging initialization error: {e}")
+            return None
+            
+    def create_spool(self):
+        spool_config = self.config_manager.config['spool']
+        if not spool_config['enabled']:
+            return None
+        try:
+            return RecognitionSpool(
+                spool_config['directory'],
+                self.recognize_spooled,
+                self.deliver_spooled,
+                base_delay=spool_config['base_delay'],
+                max_delay=spool_config['max_delay'],
+                max_items=spool_config['max_items'],
+                breaker=CircuitBreaker(spool_config['failure_threshold'], spool_config['reset_timeout']),
+                on_recovered=self.deliver_recovered if self.history else None
+            )
+        except Exception as e:
+            print(f"Spool initialization error: {e}")
+            return None
+            
+    def start_profiler(self, duration=None):
+        profiler_config = self.config_manager.config['profiler']
+        if duration is None:
+            duration = profiler_config['duration']
+        if not self.profiler:
+            self.profiler = SamplingProfiler(profiler_config['output_dir'], profiler_config['interval_ms'] / 1000.0)
+        if self.profiler.start(duration, self.profiler_finished):
+            self.signals.status_update.emit(f"Profiling for {duration}s...")
+            
+    def profiler_finished(self, paths):
+        if paths:
+            self.signals.status_update.emit(f"Profile saved: {paths[0]}")
+        else:
+            self.signals.status_update.emit("Profile failed")
+            
+    def create_output_sinks(self):
+        output_config = self.config_manager.config['output']
+        sinks = []
+        for name in output_config['sinks']:
+            try:
+                if name == 'keyboard':
+                    sinks.append(KeystrokeSink(self.keyboard_controller))
+                elif name == 'clipboard':
+                    sinks.append(ClipboardPasteSink(self.keyboard_controller))
+                elif name == 'socket':
+                    sinks.append(SocketPublisherSink(output_config['publish_host'], output_config['publish_port']))
+                else:
+                    print(f"Unknown output sink: {name}")
+            except Exception as e:
+                print(f"Output sink error ({name}): {e}")
+        return sinks
+        
+    def create_wake_listener(self):
+        wake_config = self.config_manager.config['wake_word']
+        if not wake_config['enabled']:
+            return None
+        try:
+            templates, threshold = load_templates(wake_config['templates_file'])
+        except FileNotFoundError:
+            self.signals.status_update.emit("Wake word not trained")
+            return None
+        except Exception as e:
+            print(f"Wake word initialization error: {e}")
+            return None
+        detector = WakeWordDetector(templates, threshold)
+        return WakeWordListener(self.microphone, detector, self.signals.wake_detected.emit,
+                                cpu_budget=wake_config['cpu_budget'])
+        
+    def start_idle_listening(self, previous=None):
+        if self.is_recording or self.training_wake_word:
+            return
+        if not self.wake_listener:
+            self.wake_listener = self.create_wake_listener()
+        if self.wake_listener:
+            self.wake_listener.start(previous)
+            self.signals.status_update.emit("Waiting for wake word")
+            
+    def stop_idle_listening(self):
+        if self.wake_listener:
+            return self.wake_listener.stop()
+        return None
+        
+    def on_wake_word(self):
+        if not self.is_recording:
+            self.start_recording(wake=True)
+            
+    def train_wake_word(self):
+        if self.is_recording or self.training_wake_word:
+            return
+        self.training_wake_word = True
+        previous = self.stop_idle_listening()
+        threading.Thread(target=self.record_wake_word, args=(previous,), name='wake-training', daemon=True).start()
+        
+    def record_wake_word(self, previous):
+        if previous:
+            previous.join()
+        wake_config = self.config_manager.config['wake_word']
+        templates = []
+        try:
+            with self.microphone as source:
+                while len(templates) < WAKE_WORD_SAMPLES:
+                    self.signals.status_update.emit(f"Say your wake word ({len(templates) + 1}/{WAKE_WORD_SAMPLES})")
+                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=2)
+                    features = extract_features(audio.get_raw_data(), audio.sample_rate, audio.sample_width)
+                    if len(features) >= 10:
+                        templates.append(features)
+                        
+            threshold = calibrate_threshold(templates, wake_config['sensitivity'])
+            if threshold is None:
+                self.signals.status_update.emit("Wake word samples too different, try again")
+                return
+            save_templates(wake_config['templates_file'], templates, threshold)
+            self.wake_listener = None
+            self.signals.status_update.emit("Wake word saved")
+        except sr.WaitTimeoutError:
+            self.signals.status_update.emit("Wake word training timed out")
+        except Exception as e:
+            print(f"Wake word training error: {e}")
+        finally:
+            self.training_wake_word = False
+            self.start_idle_listening()
+            
+    def show_history(self):
+        dialog = HistoryDialog(self.history, lambda text: self.signals.text_ready.emit(text, {}), self)
+        dialog.exec_()
+        
+    def prompt_retype_last(self):
+        count, ok = QInputDialog.getInt(self, 'Re-type Last', 'Number of phrases:', 2, 1,
+                                        self.config_manager.config['history']['index_size'])
+        if ok:
+            self.retype_last(count)
+            
+    def retype_last(self, count=1):
+        if not self.history:
+            return
+        for entry in self.history.last(count):
+            self.signals.text_ready.emit(entry.text, {})
             
     def update_button_style(self):
         primary = self.config_manager.config['theme']['primary_color']
@@ -239,27 +636,78 @@ class FloatingWidget(QWidget):
         with self.microphone as source:
             self.recognizer.adjust_for_ambient_noise(source, duration=1)
             self.recognizer.energy_threshold = self.config_manager.config['recognition']['energy_threshold']
-            
-        self.recognition_thread = None
         
     def setup_hotkey(self):
+        # Drop the previous registrations so each settings save does not stack another handler
+        for handle in self.hotkey_handles:
+            try:
+                keyboard.remove_hotkey(handle)
+            except:
+                pass
+        self.hotkey_handles = []
+        
         try:
-            keyboard.add_hotkey(self.config_manager.config['hotkey'], self.toggle_recording)
+            self.hotkey_handles.append(
+                keyboard.add_hotkey(self.config_manager.config['hotkey'], self.toggle_recording))
+            if self.history:
+                self.hotkey_handles.append(
+                    keyboard.add_hotkey(self.config_manager.config['history']['retype_hotkey'],
+                                        self.after_modifiers_released, args=(self.retype_last,),
+                                        trigger_on_release=True))
+            if self.nbest:
+                self.hotkey_handles.append(
+                    keyboard.add_hotkey(self.config_manager.config['nbest']['correct_hotkey'],
+                                        self.after_modifiers_released,
+                                        args=(self.signals.correction_requested.emit,),
+                                        trigger_on_release=True))
         except:
             pass
             
+    def after_modifiers_released(self, action):
+        # Hotkey callbacks run on the keyboard listener thread, which has to keep going to see the release
+        threading.Thread(target=self.wait_for_modifiers, args=(action,), name='hotkey', daemon=True).start()
+        
+    def wait_for_modifiers(self, action):
+        # Typing while the hotkey's modifiers are held turns every keystroke into a shortcut
+        deadline = time.monotonic() + MODIFIER_RELEASE_TIMEOUT
+        while True:
+            if not self.modifier_held():
+                action()
+                return
+            if time.monotonic() > deadline:
+                self.signals.status_update.emit("Release the hotkey to type")
+                return
+            time.sleep(0.02)
+            
+    def modifier_held(self):
+        for key in MODIFIER_KEYS:
+            try:
+                if keyboard.is_pressed(key):
+                    return True
+            except Exception:
+                pass
+        return False
+        
     def toggle_recording(self):
         if not self.is_recording:
             self.start_recording()
         else:
             self.stop_recording()
             
-    def start_recording(self):
+    def start_recording(self, wake=False):
+        if self.training_wake_word:
+            # Training holds the microphone; a capture thread could not open it
+            self.signals.status_update.emit("Finish wake word training first")
+            return
         self.is_recording = True
+        self.wake_started = wake
+        self.recording_session += 1
         self.create_mic_icon()
         self.update_button_style()
         
-        self.recognition_thread = threading.Thread(target=self.record_audio)
+        previous = [self.recognition_thread, self.stop_idle_listening()]
+        self.recognition_thread = threading.Thread(target=self.record_audio, args=(self.recording_session, previous),
+                                                   name='capture')
         self.recognition_thread.daemon = True
         self.recognition_thread.start()
         
@@ -271,62 +719,188 @@ class FloatingWidget(QWidget):
         self.update_button_style()
         
         self.signals.status_update.emit("Stopped")
+        self.start_idle_listening(self.recognition_thread)
         
-    def record_audio(self):
+    def record_audio(self, session, previous=()):
+        # A quick stop/start can overlap the previous capture loop; the microphone only opens once
+        for thread in previous:
+            if thread:
+                thread.join()
+            
+        last_speech = time.monotonic()
         with self.microphone as source:
-            while self.is_recording:
+            while self.is_recording and session == self.recording_session:
                 try:
                     timeout = self.config_manager.config['recognition']['timeout']
                     phrase_limit = self.config_manager.config['recognition']['phrase_time_limit']
                     audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_limit)
+                    last_speech = time.monotonic()
                     
-                    threading.Thread(target=self.recognize_speech, args=(audio,)).start()
+                    threading.Thread(target=self.recognize_speech, args=(audio,), name='recognize').start()
                     
                 except sr.WaitTimeoutError:
-                    pass
+                    # Dictation started by the wake word goes back to idle listening after a quiet spell
+                    idle_timeout = self.config_manager.config['wake_word']['idle_timeout']
+                    if self.wake_started and time.monotonic() - last_speech > idle_timeout:
+                        self.signals.idle_timeout.emit()
+                        break
                 except Exception as e:
                     print(f"Error recording: {e}")
                     
     def recognize_speech(self, audio):
+        if self.spool and self.spool.should_defer():
+            self.spool_audio(audio)
+            return
+            
         try:
             self.signals.status_update.emit("Processing...")
             
-            language = self.config_manager.config['language']
-            text = self.recognizer.recognize_google(audio, language=language)
+            started = time.time()
+            language, alternatives = self.recognize_segment(audio)
+            if self.spool:
+                self.spool.breaker.record_success()
             
-            if text:
-                if self.config_manager.config['auto_punctuation']:
-                    text = self.add_punctuation(text)
-                    
-                self.signals.text_ready.emit(text)
-                self.signals.status_update.emit(f"Typed: {text[:20]}...")
+            if alternatives:
+                self.deliver_result(audio, alternatives, time.time() - started, language)
                 
         except sr.UnknownValueError:
             self.signals.status_update.emit("Could not understand")
         except sr.RequestError as e:
-            self.signals.status_update.emit(f"Error: {e}")
+            if self.spool:
+                self.spool.breaker.record_failure()
+                self.spool_audio(audio)
+            else:
+                self.signals.status_update.emit(f"Error: {e}")
         except Exception as e:
             print(f"Recognition error: {e}")
             
+    def deliver_result(self, audio, alternatives, recognition_seconds, language=None):
+        transcript = alternatives[0][0]
+        if self.nbest and self.is_correction_command(transcript):
+            self.signals.correction_requested.emit()
+            return
+            
+        text = self.format_text(transcript)
+        timings = {
+            'audio_seconds': len(audio.frame_data) / float(audio.sample_rate * audio.sample_width),
+            'recognition_seconds': recognition_seconds
+        }
+        if language:
+            timings['language'] = language
+        if self.nbest:
+            timings['nbest_id'] = self.nbest.add(alternatives)
+        self.signals.text_ready.emit(text, timings)
+        self.signals.status_update.emit(f"Typed: {text[:20]}...")
+        self.record_history(audio, text, recognition_seconds)
+        
+    def spool_audio(self, audio):
+        try:
+            self.spool.add(audio)
+            self.signals.status_update.emit(f"Offline: {self.spool.pending()} queued for retry")
+        except Exception as e:
+            print(f"Spool error: {e}")
+            
+    def recognize_spooled(self, audio):
+        return self.recognize_segment(audio)
+        
+    def deliver_spooled(self, result, audio):
+        language, alternatives = result
+        if not alternatives:
+            return
+        self.deliver_result(audio, alternatives, 0.0, language)
+        
+    def deliver_recovered(self, result, audio, captured_at):
+        # Left over from an earlier run: keep it for re-typing instead of typing into whatever has focus now
+        language, alternatives = result
+        if not alternatives or self.is_correction_command(alternatives[0][0]):
+            return
+        text = self.format_text(alternatives[0][0])
+        self.record_history(audio, text, 0.0, captured_at)
+        self.signals.status_update.emit(f"Recovered to history: {text[:20]}...")
+        
+    def recognize_segment(self, audio):
+        if self.language_selector:
+            return self.language_selector.recognize(audio)
+        language = self.config_manager.config['language']
+        return language, self.recognize_alternatives(audio, language)
+            
+    def recognize_alternatives(self, audio, language):
+        if self.hedger:
+            return self.hedger.recognize(audio, language)
+        return BACKENDS['google'](self.recognizer, audio, language)
+        
+    def is_correction_command(self, transcript):
+        command = self.config_manager.config['nbest']['correct_command']
+        return transcript.strip(' .!?,').lower() == command.lower()
+        
+    def correct_last(self):
+        entry = self.nbest.correctable() if self.nbest else None
+        if not entry:
+            self.signals.status_update.emit("Nothing to correct")
+            return
+            
+        new_text = entry.next_distinct(self.format_text)
+        if new_text is None:
+            self.signals.status_update.emit("No other alternatives")
+            return
+            
+        for sink in self.output_sinks:
+            try:
+                sink.replace(entry.typed, new_text)
+            except Exception as e:
+                print(f"Correction error: {e}")
+        entry.typed = new_text
+        self.signals.status_update.emit(f"Corrected: {new_text[:20]}...")
+        
+    def record_history(self, audio, text, recognition_seconds, captured_at=None):
+        if not self.history:
+            return
+        try:
+            self.history.append(audio, text, recognition_seconds, captured_at)
+        except Exception as e:
+            print(f"History error: {e}")
+            
+    def format_text(self, text):
+        if self.config_manager.config['auto_punctuation']:
+            text = self.add_punctuation(text)
+        return text
+        
     def add_punctuation(self, text):
         if text and text[-1] not in '.!?':
             text += '.'
         return text.capitalize()
         
-    def type_text(self, text):
-        time.sleep(0.1)
-        
-        for char in text:
-            self.keyboard_controller.type(char)
-            time.sleep(0.01)
-            
-        self.keyboard_controller.type(' ')
+    def type_text(self, text, timings):
+        nbest_id = timings.pop('nbest_id', None)
+        for sink in self.output_sinks:
+            try:
+                sink.deliver(text, True, timings)
+            except Exception as e:
+                print(f"Output error: {e}")
+                
+        if self.nbest:
+            if nbest_id is None:
+                self.nbest.invalidate()
+            else:
+                self.nbest.mark_typed(nbest_id, text)
         
     def update_status(self, status):
         self.setToolTip(status)
         
     def closeEvent(self, event):
         self.is_recording = False
+        self.stop_idle_listening()
+        if self.history:
+            self.history.close()
+        if self.spool:
+            self.spool.stop()
+        for sink in self.output_sinks:
+            sink.close()
+        if self.language_selector:
+            self.language_selector.shutdown()
+        if self.hedger:
+            print(f"Hedging stats: {self.hedger.stats()}")
+            self.hedger.shutdown()
         event.accept()
 
 class SystemTrayApp:
@@ -343,13 +917,15 @@ class SystemTrayApp:
         
         menu = pystray.Menu(
             item('Show/Hide', self.toggle_window),
+            item('Re-type Last', self.retype_last),
+            item('Profile', self.start_profiler),
             item('Settings', self.show_settings),
             item('Exit', self.quit_app)
         )
         
         self.icon = pystray.Icon("voice_dictation", image, "Voice Dictation", menu)
         
-        icon_thread = threading.Thread(target=self.icon.run)
+        icon_thread = threading.Thread(target=self.icon.run, name='tray')
         icon_thread.daemon = True
         icon_thread.start()
         
@@ -359,6 +935,12 @@ class SystemTrayApp:
         else:
             self.widget.show()
             
+    def retype_last(self, icon, item):
+        self.widget.retype_last()
+        
+    def start_profiler(self, icon, item):
+        self.widget.start_profiler()
+        
     def show_settings(self, icon, item):
         self.widget.show_settings()
             
@@ -367,11 +949,18 @@ class SystemTrayApp:
         QApplication.quit()
 
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile', type=float, metavar='SECONDS',
+                        help='sample all threads for SECONDS after startup and write a flamegraph file')
+    args, qt_args = parser.parse_known_args()
+    
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setQuitOnLastWindowClosed(False)
     
     widget = FloatingWidget()
     tray_app = SystemTrayApp(widget)
+    if args.profile:
+        widget.start_profiler(args.profile)
     
     sys.exit(app.exec_())
 
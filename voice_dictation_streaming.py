@@ -1,19 +1,20 @@
 import sys
+import argparse
 import threading
-import time
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QHBoxLayout
 from PyQt5.QtCore import Qt, QPoint, pyqtSignal, QObject
 from PyQt5.QtGui import QIcon, QPixmap, QPainter, QBrush, QColor, QPen
 import speech_recognition as sr
 import pynput.keyboard
-import pyperclip
+from recognition_spool import RecognitionSpool
+from output_sinks import ClipboardPasteSink, SocketPublisherSink
 
 class SignalEmitter(QObject):
     text_ready = pyqtSignal(str)
     status_update = pyqtSignal(str)
 
 class FloatingWidget(QWidget):
-    def __init__(self):
+    def __init__(self, paste=True, publish_port=None):
         super().__init__()
         self.is_recording = False
         self.recognizer = sr.Recognizer()
@@ -26,15 +27,25 @@ class FloatingWidget(QWidget):
         
         self.microphone = None
         self.keyboard_controller = pynput.keyboard.Controller()
+        self.output_sinks = []
+        if paste:
+            self.output_sinks.append(ClipboardPasteSink(self.keyboard_controller))
+        if publish_port:
+            try:
+                self.output_sinks.append(SocketPublisherSink(port=publish_port))
+            except Exception as e:
+                print(f"Output sink error (socket): {e}")
         self.signals = SignalEmitter()
         self.signals.text_ready.connect(self.type_text)
         self.signals.status_update.connect(self.update_status)
         
         self.stop_listening = None
         self.mic_stream = None
+        self.spool = RecognitionSpool('spool', self.recognize, self.deliver_spooled)
         
         self.init_ui()
         self.init_microphone()
+        self.spool.start()
         
     def init_ui(self):
         self.setWindowTitle('Voice Dictation')
@@ -205,31 +216,47 @@ class FloatingWidget(QWidget):
             print(f"Callback error: {e}")
             
     def process_audio(self, audio):
+        # Keep new phrases behind spooled ones so text stays in order
+        if self.spool.should_defer():
+            self.spool_audio(audio)
+            return
+            
         try:
             # Fast recognition
-            text = self.recognizer.recognize_google(audio, language='en-US')
+            text = self.recognize(audio)
+            self.spool.breaker.record_success()
             
             if text and self.is_recording:
                 self.signals.text_ready.emit(text)
                 
         except sr.UnknownValueError:
-            pass
+            self.spool.breaker.record_success()
         except sr.RequestError:
-            self.signals.status_update.emit("API Error")
+            self.spool.breaker.record_failure()
+            self.spool_audio(audio)
         except Exception as e:
             print(f"Recognition error: {e}")
             
-    def type_text(self, text):
-        # Direct typing for even faster response
-        for word in text.split():
-            pyperclip.copy(word + ' ')
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio, language='en-US')
+        
+    def spool_audio(self, audio):
+        try:
+            self.spool.add(audio)
+            self.signals.status_update.emit(f"API Error: {self.spool.pending()} queued")
+        except Exception as e:
+            print(f"Spool error: {e}")
             
-            self.keyboard_controller.press(pynput.keyboard.Key.ctrl)
-            self.keyboard_controller.press('v')
-            self.keyboard_controller.release('v')
-            self.keyboard_controller.release(pynput.keyboard.Key.ctrl)
+    def deliver_spooled(self, text, audio):
+        self.signals.text_ready.emit(text)
             
-            time.sleep(0.01)  # Minimal delay between words
+    def type_text(self, text):
+        # One paste per phrase; subscribers get the text without any keystrokes
+        for sink in self.output_sinks:
+            try:
+                sink.deliver(text)
+            except Exception as e:
+                print(f"Output error: {e}")
             
         self.signals.status_update.emit("Ready")
         
@@ -238,11 +265,21 @@ class FloatingWidget(QWidget):
         
     def closeEvent(self, event):
         self.stop_recording()
+        self.spool.stop()
+        for sink in self.output_sinks:
+            sink.close()
         event.accept()
 
 def main():
-    app = QApplication(sys.argv)
-    widget = FloatingWidget()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--publish', type=int, nargs='?', const=47321, metavar='PORT',
+                        help='publish transcripts as JSON lines on localhost:PORT (default 47321)')
+    parser.add_argument('--no-paste', action='store_true',
+                        help='only publish transcripts, do not paste into the focused window')
+    args, qt_args = parser.parse_known_args()
+    
+    app = QApplication(sys.argv[:1] + qt_args)
+    widget = FloatingWidget(paste=not args.no_paste, publish_port=args.publish)
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
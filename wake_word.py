@@ -0,0 +1,229 @@
+import audioop
+import json
+import math
+import threading
+import time
+
+# Features are computed on 20 ms frames of 8 kHz, 16-bit mono audio
+FEATURE_RATE = 8000
+FEATURE_WIDTH = 2
+FRAME_SAMPLES = 160
+FRAME_BYTES = FRAME_SAMPLES * FEATURE_WIDTH
+
+SPEECH_RATIO = 3.0
+MIN_SPEECH_ENERGY = 200
+MAX_LENGTH_RATIO = 2.0
+
+
+def frame_features(frame):
+    energy = audioop.rms(frame, FEATURE_WIDTH)
+    crossings = audioop.cross(frame, FEATURE_WIDTH) / float(FRAME_SAMPLES)
+    # Energy of the first difference relative to the signal is a cheap stand-in for spectral tilt
+    diff = audioop.add(frame[FEATURE_WIDTH:], audioop.mul(frame[:-FEATURE_WIDTH], FEATURE_WIDTH, -1.0), FEATURE_WIDTH)
+    tilt = audioop.rms(diff, FEATURE_WIDTH) / (energy + 1.0)
+    return energy, crossings, tilt
+
+def normalize(frames):
+    log_energies = [math.log10(energy + 1.0) for energy, _, _ in frames]
+    mean = sum(log_energies) / len(log_energies)
+    return [[log_energy - mean, crossings * 4.0, tilt]
+            for log_energy, (_, crossings, tilt) in zip(log_energies, frames)]
+
+def to_feature_audio(data, sample_rate, sample_width, state=None):
+    if sample_width != FEATURE_WIDTH:
+        data = audioop.lin2lin(data, sample_width, FEATURE_WIDTH)
+    return audioop.ratecv(data, FEATURE_WIDTH, 1, sample_rate, FEATURE_RATE, state)
+
+def extract_features(raw, sample_rate, sample_width):
+    converted, _ = to_feature_audio(raw, sample_rate, sample_width)
+    frames = [frame_features(converted[i:i + FRAME_BYTES])
+              for i in range(0, len(converted) - FRAME_BYTES + 1, FRAME_BYTES)]
+    if not frames:
+        return []
+    # Trim leading and trailing silence so templates only cover the word itself
+    loudest = max(energy for energy, _, _ in frames)
+    voiced = [i for i, (energy, _, _) in enumerate(frames) if energy > loudest * 0.1]
+    if not voiced:
+        return []
+    return normalize(frames[voiced[0]:voiced[-1] + 1])
+
+def dtw_distance(a, b):
+    n, m = len(a), len(b)
+    if not n or not m or max(n, m) > MAX_LENGTH_RATIO * min(n, m):
+        return float('inf')
+    band = max(abs(n - m), max(n, m) // 4)
+    previous = [float('inf')] * (m + 1)
+    previous[0] = 0.0
+    for i in range(1, n + 1):
+        current = [float('inf')] * (m + 1)
+        center = i * m // n
+        for j in range(max(1, center - band), min(m, center + band) + 1):
+            x, y = a[i - 1], b[j - 1]
+            cost = math.sqrt((x[0] - y[0]) ** 2 + (x[1] - y[1]) ** 2 + (x[2] - y[2]) ** 2)
+            current[j] = cost + min(previous[j], previous[j - 1], current[j - 1])
+        previous = current
+    return previous[m] / (n + m)
+
+def calibrate_threshold(templates, sensitivity=1.5):
+    distances = [dtw_distance(a, b) for i, a in enumerate(templates) for b in templates[i + 1:]]
+    distances = [d for d in distances if d != float('inf')]
+    if not distances:
+        return None
+    return sensitivity * sum(distances) / len(distances)
+
+def save_templates(path, templates, threshold):
+    with open(path, 'w') as f:
+        json.dump({"templates": templates, "threshold": threshold}, f)
+
+def load_templates(path):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data['templates'], data['threshold']
+
+
+class WakeWordDetector:
+    def __init__(self, templates, threshold, min_frames=15, max_frames=100, hangover_frames=15):
+        self.templates = templates
+        self.threshold = threshold
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+        self.hangover_frames = hangover_frames
+        self.noise_floor = None
+        self.reset()
+
+    def reset(self):
+        self.ratecv_state = None
+        self.buffer = b''
+        self.segment = []
+        self.silent_frames = 0
+
+    def process(self, data, sample_rate, sample_width):
+        converted, self.ratecv_state = to_feature_audio(data, sample_rate, sample_width, self.ratecv_state)
+        self.buffer += converted
+        triggered = False
+        offset = 0
+        while offset + FRAME_BYTES <= len(self.buffer):
+            triggered = self.process_frame(self.buffer[offset:offset + FRAME_BYTES]) or triggered
+            offset += FRAME_BYTES
+        self.buffer = self.buffer[offset:]
+        return triggered
+
+    def skip_if_quiet(self, data, sample_rate, sample_width):
+        # A cheap loudness check on the raw chunk; a word in progress is always analysed in full
+        if self.segment or self.noise_floor is None:
+            return False
+        frame_bytes = int(sample_rate * FRAME_SAMPLES / FEATURE_RATE) * sample_width
+        scale = 2 ** (8 * (FEATURE_WIDTH - sample_width))
+        loudest = max(audioop.rms(data[i:i + frame_bytes], sample_width)
+                      for i in range(0, max(1, len(data) - frame_bytes + 1), frame_bytes)) * scale
+        if loudest > max(self.noise_floor * SPEECH_RATIO, MIN_SPEECH_ENERGY):
+            return False
+        # The skipped audio leaves a gap, so resampling starts over on the next chunk
+        self.ratecv_state = None
+        self.buffer = b''
+        return True
+
+    def process_frame(self, frame):
+        features = frame_features(frame)
+        energy = features[0]
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        speaking = energy > max(self.noise_floor * SPEECH_RATIO, MIN_SPEECH_ENERGY)
+
+        if not speaking:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * energy
+            if not self.segment:
+                return False
+            self.silent_frames += 1
+            if self.silent_frames < self.hangover_frames:
+                self.segment.append(features)
+                return False
+            return self.finish_segment()
+
+        self.silent_frames = 0
+        self.segment.append(features)
+        return False
+
+    def finish_segment(self):
+        # Trailing frames were only kept in case the word continued after a short pause
+        segment = self.segment[:len(self.segment) - self.silent_frames + 1]
+        self.segment = []
+        self.silent_frames = 0
+        if not self.min_frames <= len(segment) <= self.max_frames:
+            return False
+        vectors = normalize(segment)
+        return min(dtw_distance(vectors, template) for template in self.templates) < self.threshold
+
+
+class WakeWordListener:
+    # Keeps only the microphone and this detector awake; recognition starts after on_wake
+    def __init__(self, microphone, detector, on_wake, cpu_budget=0.02, read_seconds=0.1, budget_window=5.0):
+        self.microphone = microphone
+        self.detector = detector
+        self.on_wake = on_wake
+        self.cpu_budget = cpu_budget
+        self.read_seconds = read_seconds
+        self.budget_window = budget_window
+        self.thread = None
+        self.stop_event = None
+        self.cpu_usage = 0.0
+
+    def is_running(self):
+        return self.stop_event is not None and not self.stop_event.is_set()
+
+    def start(self, previous=None):
+        if self.is_running():
+            return
+        # Each run gets its own stop event so a run that is still shutting down cannot resume
+        waiting = [thread for thread in (previous, self.thread) if thread]
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(self.stop_event, waiting), name='wake-word', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        # Returns the thread so callers that need the microphone can wait for it to be released
+        if self.stop_event:
+            self.stop_event.set()
+        return self.thread
+
+    def run(self, stop_event, waiting):
+        # The microphone can only be opened once, so wait for anything still holding it
+        for thread in waiting:
+            thread.join()
+        if stop_event.is_set():
+            return
+
+        self.detector.reset()
+        skip_every = 0
+        chunk_index = 0
+        window_wall = time.monotonic()
+        window_cpu = time.thread_time()
+
+        try:
+            with self.microphone as source:
+                frames = max(source.CHUNK, int(source.SAMPLE_RATE * self.read_seconds))
+                while not stop_event.is_set():
+                    data = source.stream.read(frames)
+                    chunk_index += 1
+
+                    # Over budget: keep draining the stream but skip feature work on some quiet chunks
+                    if skip_every and chunk_index % skip_every and \
+                            self.detector.skip_if_quiet(data, source.SAMPLE_RATE, source.SAMPLE_WIDTH):
+                        pass
+                    elif self.detector.process(data, source.SAMPLE_RATE, source.SAMPLE_WIDTH):
+                        stop_event.set()
+                        self.on_wake()
+                        break
+
+                    elapsed = time.monotonic() - window_wall
+                    if elapsed >= self.budget_window:
+                        self.cpu_usage = (time.thread_time() - window_cpu) / elapsed
+                        if self.cpu_usage > self.cpu_budget:
+                            skip_every = min(8, max(2, skip_every * 2))
+                        elif skip_every and self.cpu_usage < self.cpu_budget / 2:
+                            skip_every = skip_every // 2 if skip_every > 2 else 0
+                        window_wall = time.monotonic()
+                        window_cpu = time.thread_time()
+        except Exception as e:
+            print(f"Wake word error: {e}")
+            stop_event.set()